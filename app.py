@@ -1,100 +1,206 @@
-# app.py - WE DON'T NEED THIS FILE SINCE IT IS THE INTERFACE
+# app.py - Gradio interface streaming progress and partial results
+import os
+import queue
+import threading
+
 import gradio as gr
-import time
-from src.constructor import generate_presentation 
-from src.prompt_configs import en_gigachat_config
-from src.generate_text_LLM import giga_generate
-from src.generate_image import api_k31_generate
-from src.font import Font
 
-logs_dir = "logs"
-fonts_dir = "fonts"
+from main import create_presentation, PROMPT_CONFIGS
+from src.admission import RejectedError
+from src.profiles import PROFILES, get_profile
+from src.cancellation import CancelToken, Cancelled
+
+# Number of presentations generated at the same time and waiting requests allowed
+CONCURRENCY_LIMIT = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "4"))
+MAX_QUEUE_SIZE = int(os.getenv("GRADIO_MAX_QUEUE_SIZE", "32"))
+
+STAGE_NAMES = {
+    "titles": "Generating titles",
+    "text": "Writing slide text",
+    "images": "Generating images",
+    "packing": "Packing presentation",
+}
+
+
+def _slides_markdown(titles, texts) -> str:
+    lines = []
+    for index, title in enumerate(titles):
+        lines.append(f"**{index + 1}. {title}**")
+        if index in texts:
+            lines.append(f"{texts[index]}")
+        lines.append("")
+    return "\n".join(lines)
 
-def create_presentation(description: str) -> str:
+
+def create_presentation_stream(
+    description: str,
+    language: str,
+    performance_profile: str = "standard",
+    notes_mode: str = "profile",
+    request: gr.Request = None,
+):
     """
-    Generate a presentation based on the given description.
-    
-    Args:
-        description (str): Description of the presentation to generate
-    
-    Returns:
-        str: Path to the generated PowerPoint file
+    Generate a presentation and stream progress, slide titles and text,
+    a text-only draft and finally the finished deck. With deferred notes the
+    deck is yielded first and again once its speaker notes are added.
+
+    `notes_mode` "profile" keeps the speaker notes setting of the profile.
+
+    Jobs are accounted to the client address; clients over their quota or
+    arriving while the service is overloaded are told when to retry. When
+    the client goes away, the job is cancelled and its backend calls freed.
+
+    Yields:
+        tuple: (status, slides, draft file, final file)
     """
-    fonts_dir = "./fonts"
-    logs_dir = "./logs"
-    
-    font = Font(fonts_dir)
-    font.set_random_font() 
-    
-    output_dir = f'{logs_dir}/{int(time.time())}'
-
-    # Initialize LLM Client
-    llm_client = LLMClient(model_version="llama-3.1-8b-instant")
-    
-    generate_presentation(
-        llm_generate=llm_client.generate, 
-        generate_image=api_k31_generate,
-        prompt_config=en_gigachat_config, 
-        description=description,
-        font=font,
-        output_dir=output_dir,
-    )
+    events = queue.Queue()
+    cancel = CancelToken()
+    tenant = request.client.host if request is not None and request.client else "anonymous"
+    if notes_mode == "profile":
+        notes_mode = get_profile(performance_profile).notes_mode
+
+    def run():
+        try:
+            create_presentation(
+                description,
+                language=language,
+                on_progress=lambda event, data: events.put((event, data)),
+                draft=True,
+                notes_mode=notes_mode,
+                performance_profile=performance_profile,
+                tenant=tenant,
+                cancel=cancel,
+            )
+        except Cancelled:
+            pass
+        except Exception as e:
+            events.put(("error", {"error": e}))
+        finally:
+            # however the job ended, the loop below must not wait forever
+            events.put(("exit", {}))
+
+    threading.Thread(target=run, daemon=True).start()
+
+    try:
+        status, titles, texts = "Queued", [], {}
+        draft_path, final_path = None, None
+        images_done = 0
+        notes_done = False
+        while True:
+            event, data = events.get()
+            if event == "stage":
+                status = STAGE_NAMES.get(data["stage"], data["stage"])
+            elif event == "titles":
+                titles = data["titles"]
+            elif event == "text":
+                texts[data["index"]] = data["text"]
+                status = f"Writing slide text ({len(texts)}/{len(titles)})"
+            elif event == "draft":
+                draft_path = data["path"]
+            elif event == "image":
+                images_done += 1
+                status = f"Generating images ({images_done}/{len(titles)})"
+            elif event == "done":
+                final_path = data["path"]
+                status = "Adding speaker notes" if notes_mode == "deferred" else "Done"
+            elif event == "notes":
+                notes_done = True
+                status = "Done" if data["status"] == "done" else "Done (speaker notes failed)"
+            elif event == "error":
+                error = data["error"]
+                if isinstance(error, RejectedError):
+                    raise gr.Error(f"The service is busy, please retry in {error.retry_after:.0f} seconds.")
+                raise gr.Error(f"Generation failed: {error}")
+            elif event == "exit":
+                # deferred notes still report through their own "notes" event
+                if final_path is None:
+                    raise gr.Error("Generation stopped before the presentation was finished.")
+                continue
+
+            yield status, _slides_markdown(titles, texts), draft_path, final_path
+            if final_path is not None and (notes_done or notes_mode != "deferred"):
+                return
+    finally:
+        # the client closed the page or the stream ended; stops a job still running
+        cancel.cancel("client disconnected")
 
-    return f'{output_dir}/presentation.pptx'
 
-# Updated examples to include language selection
 examples = [
     ["Generate a presentation on economics, 7 slides", "English"],
-    ["Сгенерируйте презентацию по экономике, 7 слайдов", "Русский"],
+    ["Сгенерируйте презентацию по экономике, 7 слайдов", "Russian"],
     ["Create a presentation on climate change, 6 slides", "English"],
-    ["Создайте презентацию об изменении климата, 6 слайдов", "Русский"],
+    ["Создайте презентацию об изменении климата, 6 слайдов", "Russian"],
     ["Create a presentation on artificial intelligence, 8 slides", "English"],
-    ["Создайте презентацию об искусственном интеллекте, 8 слайдов", "Русский"],
+    ["Создайте презентацию об искусственном интеллекте, 8 слайдов", "Russian"],
     ["Design a presentation on space exploration, 10 slides", "English"],
-    ["Разработайте презентацию о космических исследованиях, 10 слайдов", "Русский"],
+    ["Разработайте презентацию о космических исследованиях, 10 слайдов", "Russian"],
     ["Prepare a presentation on the future of renewable energy, 7 slides", "English"],
-    ["Подготовьте презентацию о будущем возобновляемой энергетики, 7 слайдов", "Русский"],
+    ["Подготовьте презентацию о будущем возобновляемой энергетики, 7 слайдов", "Russian"],
     ["Develop a presentation on the history of art movements, 9 slides", "English"],
-    ["Разработайте презентацию о истории художественных движений, 9 слайдов", "Русский"],
+    ["Разработайте презентацию о истории художественных движений, 9 слайдов", "Russian"],
     ["Generate a presentation on the impact of social media, 6 slides", "English"],
-    ["Сгенерируйте презентацию о влиянии социальных сетей, 6 слайдов", "Русский"],
+    ["Сгенерируйте презентацию о влиянии социальных сетей, 6 слайдов", "Russian"],
     ["Create a presentation on sustainable urban planning, 8 slides", "English"],
-    ["Создайте презентацию о устойчивом градостроительстве, 8 слайдов", "Русский"],
-    ["Разработайте презентацию о новшествах в области медицинских технологий, 7 слайдов", "Русский"],
+    ["Создайте презентацию о устойчивом градостроительстве, 8 слайдов", "Russian"],
+    ["Разработайте презентацию о новшествах в области медицинских технологий, 7 слайдов", "Russian"],
     ["Design a presentation on innovations in healthcare technology, 7 slides", "English"],
-    ["Подготовьте презентацию о глобальных экономических тенденциях, 5 слайдов", "Русский"],
+    ["Подготовьте презентацию о глобальных экономических тенденциях, 5 слайдов", "Russian"],
     ["Prepare a presentation on global economic trends, 5 slides", "English"],
-    ["Разработайте презентацию о психологии потребительского поведения, 6 слайдов", "Русский"],
+    ["Разработайте презентацию о психологии потребительского поведения, 6 слайдов", "Russian"],
     ["Develop a presentation on the psychology of consumer behavior, 6 slides", "English"],
-    ["Сгенерируйте презентацию о преимуществах осознанности и медитации, 7 слайдов", "Русский"],
+    ["Сгенерируйте презентацию о преимуществах осознанности и медитации, 7 слайдов", "Russian"],
     ["Generate a presentation on the benefits of mindfulness and meditation, 7 slides", "English"],
-    ["Создайте презентацию о достижениях в области автономных транспортных средств, 8 слайдов", "Русский"],
+    ["Создайте презентацию о достижениях в области автономных транспортных средств, 8 слайдов", "Russian"],
     ["Create a presentation on advancements in autonomous vehicles, 8 slides", "English"],
-    ["Разработайте презентацию о влиянии изменений климатической политики, 5 слайдов", "Русский"],
+    ["Разработайте презентацию о влиянии изменений климатической политики, 5 слайдов", "Russian"],
     ["Design a presentation on the impact of climate policy changes, 5 slides", "English"],
 ]
 
-iface = gr.Interface(
-    fn=create_presentation,
-    inputs=[
-        gr.Textbox(
-            label="Presentation Description", 
-            placeholder="Enter the description for the presentation..."
-        ),
-        gr.Dropdown(
-            label="Language",
-            choices=["English", "Russian"],
-            value="English"
-        )
-    ],
-    outputs=gr.File(
-        label="Download Presentation"
-    ),
-    title="Presentation Generator",
-    description="Generate a presentation based on the provided description and selected language. Click the button to download the presentation.",
-    css="footer {visibility: hidden}",
-    allow_flagging="never",  
-    examples=examples  
-)
-
-iface.launch()
\ No newline at end of file
+with gr.Blocks(title="Presentation Generator", css="footer {visibility: hidden}") as demo:
+    gr.Markdown(
+        "# Presentation Generator\n"
+        "Generate a presentation based on the provided description and selected language. "
+        "Slide titles and text appear as they are written; a text-only draft "
+        "can be downloaded before the final deck is ready."
+    )
+    with gr.Row():
+        with gr.Column():
+            description = gr.Textbox(
+                label="Presentation Description",
+                placeholder="Enter the description for the presentation...",
+            )
+            language = gr.Dropdown(
+                label="Language",
+                choices=sorted(PROMPT_CONFIGS),
+                value="English",
+            )
+            performance_profile = gr.Radio(
+                label="Profile",
+                choices=list(PROFILES),
+                value="standard",
+                info="draft: a deck in seconds without images; high: the best images and notes",
+            )
+            notes_mode = gr.Radio(
+                label="Speaker Notes",
+                choices=["profile", "deferred", "inline", "skip"],
+                value="profile",
+                info="deferred: the deck is ready sooner and notes are added afterwards",
+            )
+            generate_button = gr.Button("Generate", variant="primary")
+        with gr.Column():
+            status = gr.Markdown("Waiting for a description")
+            draft_file = gr.File(label="Download Draft (text only)")
+            final_file = gr.File(label="Download Presentation")
+    slides = gr.Markdown()
+
+    gr.Examples(examples=examples, inputs=[description, language])
+
+    generate_button.click(
+        fn=create_presentation_stream,
+        inputs=[description, language, performance_profile, notes_mode],
+        outputs=[status, slides, draft_file, final_file],
+        concurrency_limit=CONCURRENCY_LIMIT,
+    )
+
+if __name__ == "__main__":
+    demo.queue(max_size=MAX_QUEUE_SIZE).launch()
@@ -0,0 +1,202 @@
+"""
+Micro-benchmarks for slide rendering and text fitting.
+
+Runs generate_image_slide, generate_plain_text_slide, generate_title_slide
+and text fitting over a matrix of text lengths, title lengths, font families
+and image shapes. Fixture images are generated locally, no network is used.
+
+Usage:
+    python -m benchmarks.bench_slides --output bench.json
+    python -m benchmarks.bench_slides --output new.json --compare bench.json
+"""
+import os
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List
+
+from PIL import Image
+from pptx.util import Inches
+
+from src.font import Font
+from src.constructor import new_presentation
+from src.slides import generate_image_slide, generate_plain_text_slide, generate_title_slide
+from src.slides.slide_utils import add_paragraph, fit_text_to_box
+
+WORDS = (
+    "electric vehicles reduce emissions while charging networks expand across "
+    "cities and highways battery costs keep falling as manufacturers scale "
+    "production and governments offer incentives for cleaner transport"
+).split()
+
+TEXT_LENGTHS = {"short": 8, "medium": 25, "long": 60}
+TITLE_LENGTHS = {"short": 1, "medium": 4, "long": 10}
+IMAGE_SIZES = {"square": (1024, 1024), "portrait": (768, 1344)}
+
+
+def make_text(num_words: int) -> str:
+    return " ".join(WORDS[i % len(WORDS)] for i in range(num_words))
+
+
+def make_fixtures(fixtures_dir: str) -> Dict[str, str]:
+    """Deterministic gradient pictures, one per image shape."""
+    paths = {}
+    for name, (width, height) in IMAGE_SIZES.items():
+        path = os.path.join(fixtures_dir, f"{name}.png")
+        gradient = Image.linear_gradient("L").resize((width, height))
+        Image.merge("RGB", (gradient, gradient.transpose(Image.FLIP_TOP_BOTTOM), gradient)).save(path)
+        paths[name] = path
+    return paths
+
+
+def measure(fn: Callable[[], None], repeats: int) -> Dict[str, float]:
+    """Time `fn` without tracing, then count its allocations in one traced run."""
+    fn()  # warm-up, loads glyph tables and PIL plugins
+    timings = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "alloc_blocks": sum(max(stat.count_diff, 0) for stat in stats),
+        "alloc_kb": sum(max(stat.size_diff, 0) for stat in stats) / 1024,
+        "peak_kb": peak / 1024,
+    }
+
+
+def _fit_case(text: str, font: Font, use_glyph_tables: bool) -> Callable[[], None]:
+    width, height = Inches(7), Inches(5.5)
+
+    def run():
+        presentation = new_presentation()
+        slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+        text_frame = slide.shapes.add_textbox(0, 0, width, height).text_frame
+        add_paragraph(text_frame).text = text
+        if use_glyph_tables:
+            fit_text_to_box(text_frame, width, height, font.basic, font.max_size)
+        else:
+            try:
+                text_frame.fit_text(font_file=font.basic, max_size=font.max_size)
+            except Exception:
+                pass  # python-pptx fails when a single word is wider than the box
+
+    return run
+
+
+def build_cases(font: Font, pictures: Dict[str, str]) -> List[Dict]:
+    cases = []
+    for font_name in font._find_available_fonts():
+        case_font = Font(font.fonts_dir)
+        case_font.set_font(font_name)
+        for text_name, text_words in TEXT_LENGTHS.items():
+            text = make_text(text_words)
+            for title_name, title_words in TITLE_LENGTHS.items():
+                title = make_text(title_words).title()
+                for image_name, picture_path in pictures.items():
+                    cases.append({
+                        "bench": "generate_image_slide",
+                        "params": {"font": font_name, "text": text_name, "title": title_name, "image": image_name},
+                        "fn": lambda t=title, x=text, p=picture_path, f=case_font: generate_image_slide(
+                            new_presentation(), title=t, text=x, picture_path=p, font=f, rng=random.Random(0),
+                        ),
+                    })
+                cases.append({
+                    "bench": "generate_plain_text_slide",
+                    "params": {"font": font_name, "text": text_name, "title": title_name},
+                    "fn": lambda t=title, x=text, f=case_font: generate_plain_text_slide(
+                        new_presentation(), title=t, text=x, background_path=None, font=f,
+                    ),
+                })
+            for variant, use_tables in (("fit_text", False), ("fit_text_to_box", True)):
+                cases.append({
+                    "bench": variant,
+                    "params": {"font": font_name, "text": text_name},
+                    "fn": _fit_case(text, case_font, use_tables),
+                })
+        for title_name, title_words in TITLE_LENGTHS.items():
+            title = make_text(title_words).title()
+            cases.append({
+                "bench": "generate_title_slide",
+                "params": {"font": font_name, "title": title_name},
+                "fn": lambda t=title, f=case_font: generate_title_slide(new_presentation(), title=t, font=f),
+            })
+    return cases
+
+
+def case_key(result: Dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['bench']}[{params}]"
+
+
+def compare(results: List[Dict], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {case_key(r): r for r in json.load(f)["results"]}
+    per_bench: Dict[str, List[float]] = {}
+    for result in results:
+        old = baseline.get(case_key(result))
+        if old is None:
+            continue
+        ratio = result["median_ms"] / old["median_ms"]
+        per_bench.setdefault(result["bench"], []).append(ratio)
+    for bench, ratios in sorted(per_bench.items()):
+        print(f"{bench:28s} median time x{statistics.geometric_mean(ratios):.2f} vs baseline ({len(ratios)} cases)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark slide rendering and text fitting.")
+    parser.add_argument("--fonts-dir", default="./fonts")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--bench", action="append", help="Only run the named benchmark(s)")
+    parser.add_argument("--output", default="bench_slides.json", help="Where to save the JSON results")
+    parser.add_argument("--compare", help="Previous JSON results to compare against")
+    args = parser.parse_args()
+
+    font = Font(args.fonts_dir)
+    results = []
+    with tempfile.TemporaryDirectory() as fixtures_dir:
+        pictures = make_fixtures(fixtures_dir)
+        cases = [c for c in build_cases(font, pictures) if not args.bench or c["bench"] in args.bench]
+        for index, case in enumerate(cases):
+            stats = measure(case["fn"], args.repeats)
+            result = {"bench": case["bench"], "params": case["params"], **stats}
+            results.append(result)
+            print(f"[{index + 1}/{len(cases)}] {case_key(result)}: {stats['median_ms']:.2f} ms, {stats['alloc_kb']:.0f} KiB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "repeats": args.repeats,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results saved to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,142 @@
-import time
-from src.constructor import generate_presentation 
-from src.prompt_configs import en_gigachat_config
-from src.generate_text_LLM import LLMClient
-from src.generate_image import api_sd_generate
-from src.font import Font
+import argparse
+from typing import Callable, Optional
+from src.session import PresentationGenerator, PROMPT_CONFIGS
+from src.profiles import PROFILES, DEFAULT_PROFILE, get_profile
+from src.cancellation import CancelToken
 
-def create_presentation(description: str) -> str:
+_generator: Optional[PresentationGenerator] = None
+
+def get_generator() -> PresentationGenerator:
+    """
+    Process-wide generation session, created on first use.
+    """
+    global _generator
+    if _generator is None:
+        _generator = PresentationGenerator(
+            fonts_dir="./fonts",
+            logs_dir="./logs",
+            cache_dir="./cache",
+            model_version="llama-3.1-8b-instant",
+        )
+    return _generator
+
+def create_presentation(
+    description: str,
+    time_limit: Optional[float] = None,
+    priority: str = "interactive",
+    profile: bool = False,
+    preview: bool = False,
+    language: str = "English",
+    on_progress: Optional[Callable[[str, dict], None]] = None,
+    draft: bool = False,
+    image_quality: Optional[str] = None,
+    notes_mode: Optional[str] = None,
+    tenant: str = "default",
+    seed: Optional[int] = None,
+    performance_profile: Optional[str] = None,
+    cancel: Optional[CancelToken] = None,
+) -> str:
     """
     Generate a presentation based on the given description.
     
     Args:
         description (str): Description of the presentation to generate
+        time_limit (Optional[float]): Seconds until the deck must be ready; slides
+            are degraded as the limit approaches
+        priority (str): Scheduling class of the backend calls, "interactive" or "batch"
+        profile (bool): Write a CPU profile and per-stage memory peaks next to the deck
+        preview (bool): Render a PNG contact sheet of the slides next to the deck
+        language (str): "English" or "Russian"
+        on_progress (Optional[Callable[[str, dict], None]]): Receives progress events
+            and partial results, see generate_presentation
+        draft (bool): Save a text-only draft deck before the images are generated
+        image_quality (Optional[str]): "draft", "standard" or "high" image resolution and
+            steps, overriding the profile
+        notes_mode (Optional[str]): "inline", "deferred" (written after the deck is returned)
+            or "skip", overriding the profile
+        tenant (str): Client the job is accounted to by admission control
+        seed (Optional[int]): Seed for a reproducible, byte-identical deck
+        performance_profile (Optional[str]): "draft" (a deck in seconds), "standard" or
+            "high" (the default)
+        cancel (Optional[CancelToken]): Cancel it to stop the job and free its backend calls
     
     Returns:
         str: Path to the generated PowerPoint file
-    """
-    fonts_dir = "./fonts"
-    logs_dir = "./logs"
-    
-    font = Font(fonts_dir)
-    font.set_random_font() 
-    
-    output_dir = f'{logs_dir}/{int(time.time())}'
 
-    # Initialize LLM Client
-    llm_client = LLMClient(model_version="llama-3.1-8b-instant")
-    
-    generate_presentation(
-        llm_generate=llm_client.generate, 
-        generate_image=api_sd_generate,
-        prompt_config=en_gigachat_config, 
-        description=description,
-        font=font,
-        output_dir=output_dir,
+    Raises:
+        RejectedError: The tenant is over its quota or the service is overloaded.
+        Cancelled: `cancel` was cancelled before the deck was ready.
+    """
+    return get_generator().generate(
+        description,
+        tenant=tenant,
+        language=language,
+        time_limit=time_limit,
+        priority=priority,
+        profile=profile,
+        preview=preview,
+        on_progress=on_progress,
+        draft=draft,
+        image_quality=image_quality,
+        notes_mode=notes_mode,
+        seed=seed,
+        performance_profile=performance_profile,
+        cancel=cancel,
     )
 
-    return f'{output_dir}/presentation.pptx'
-
 def main():
-    # Example description
-    input_description = "Create a presentation on electric vehicles."
+    parser = argparse.ArgumentParser(description="Generate a presentation from a description.")
+    parser.add_argument(
+        "description",
+        nargs="?",
+        default="Create a presentation on electric vehicles.",
+        help="Description of the presentation to generate",
+    )
+    parser.add_argument("--time-limit", type=float, default=None, help="Seconds until the deck must be ready")
+    parser.add_argument("--priority", choices=["interactive", "batch"], default="interactive")
+    parser.add_argument("--profiling", action="store_true", help="Write a CPU profile and memory peaks per stage")
+    parser.add_argument("--preview", action="store_true", help="Render a PNG contact sheet of the slides")
+    parser.add_argument("--language", choices=sorted(PROMPT_CONFIGS), default="English")
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        default=DEFAULT_PROFILE,
+        help="Speed and quality trade-off: draft arrives in seconds, high gives the best deck",
+    )
+    parser.add_argument(
+        "--image-quality",
+        choices=["draft", "standard", "high"],
+        default=None,
+        help="Overrides the image quality of the profile",
+    )
+    parser.add_argument(
+        "--notes",
+        choices=["inline", "deferred", "skip"],
+        default=None,
+        help="Speaker notes with the slides, after the deck is saved, or not at all; overrides the profile",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for a reproducible deck")
+    args = parser.parse_args()
     
     # Generate the presentation and get the file path
-    presentation_file = create_presentation(input_description)
+    presentation_file = create_presentation(
+        args.description,
+        time_limit=args.time_limit,
+        priority=args.priority,
+        profile=args.profiling,
+        preview=args.preview,
+        language=args.language,
+        image_quality=args.image_quality,
+        notes_mode=args.notes,
+        seed=args.seed,
+        performance_profile=args.profile,
+    )
     
     print(f"Presentation generated: {presentation_file}")
+    if (args.notes or get_profile(args.profile).notes_mode) == "deferred":
+        print("Adding speaker notes in the background...")
+        get_generator().close()
+        print(f"Speaker notes added: {presentation_file}")
 
 if __name__ == "__main__": 
     main()
\ No newline at end of file
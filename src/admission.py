@@ -0,0 +1,243 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .metrics import metrics
+from .cancellation import CancelToken, Cancelled
+
+
+class RejectedError(RuntimeError):
+    def __init__(self, reason: str, retry_after: float):
+        """
+        A job was refused by admission control.
+
+        Args:
+            reason (str): "rate", "tenant_concurrency", "queue_full" or "queue_timeout".
+            retry_after (float): Seconds after which a retry is likely to be admitted.
+        """
+        super().__init__(f"Rejected ({reason}), retry after {retry_after:.0f} s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TenantQuota:
+    def __init__(self, max_concurrent: int = 2, rate_per_minute: Optional[float] = 6.0, burst: int = 3):
+        """
+        Limits of one tenant.
+
+        Args:
+            max_concurrent (int): Jobs of the tenant running or queued at once.
+            rate_per_minute (Optional[float]): Sustained number of jobs started per
+                minute, None for no rate limit.
+            burst (int): Jobs that can be started back to back before the rate applies.
+        """
+        self.max_concurrent = max_concurrent
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+
+
+class _TenantState:
+    def __init__(self, quota: TenantQuota):
+        self.quota = quota
+        self.tokens = float(quota.burst)
+        self.updated = time.monotonic()
+        self.jobs = 0
+
+    def refill(self, now: float) -> None:
+        if self.quota.rate_per_minute is None:
+            self.tokens = float(self.quota.burst)
+            return
+        rate = self.quota.rate_per_minute / 60.0
+        self.tokens = min(self.quota.burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def token_eta(self) -> float:
+        return (1.0 - self.tokens) * 60.0 / self.quota.rate_per_minute
+
+
+class Ticket:
+    def __init__(self, controller: "AdmissionController", tenant: str):
+        """
+        An admitted job. Entering the ticket waits for a running slot,
+        leaving it frees the slot and the tenant's quota. A job whose
+        `cancel` token is cancelled while waiting leaves the queue.
+        """
+        self.controller = controller
+        self.tenant = tenant
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+        self.cancel: Optional[CancelToken] = None
+        self._released = False
+
+    def __enter__(self) -> "Ticket":
+        self.controller._wait_for_slot(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_running: int = 4,
+        max_queued: int = 16,
+        max_queue_wait: float = 300.0,
+        default_quota: Optional[TenantQuota] = None,
+        quotas: Optional[Dict[str, TenantQuota]] = None,
+        initial_job_seconds: float = 60.0,
+        smoothing: float = 0.3,
+    ):
+        """
+        Admission control in front of the generation service.
+
+        A job is admitted only if its tenant is within its concurrency and
+        token-bucket rate quota and the global FIFO queue has room and an
+        expected wait below `max_queue_wait`. Otherwise it is rejected at
+        once with a retry-after hint, so admitted jobs keep a bounded wait
+        instead of everyone slowing down together under overload.
+
+        Args:
+            max_running (int): Jobs generated at the same time.
+            max_queued (int): Admitted jobs allowed to wait for a running slot.
+            max_queue_wait (float): Longest expected or actual queue wait in seconds.
+            default_quota (Optional[TenantQuota]): Quota of tenants not in `quotas`.
+            quotas (Optional[Dict[str, TenantQuota]]): Per-tenant overrides.
+            initial_job_seconds (float): Job duration assumed before any job finished.
+            smoothing (float): Weight of the latest job in the duration average.
+        """
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_queue_wait = max_queue_wait
+        self.default_quota = default_quota or TenantQuota()
+        self.quotas = dict(quotas or {})
+        self.job_seconds = initial_job_seconds
+        self.smoothing = smoothing
+
+        self._cond = threading.Condition()
+        self._tenants: Dict[str, _TenantState] = {}
+        self._queue = deque()
+        self._running = 0
+        self._rejected = 0
+
+    def _tenant(self, tenant: str) -> _TenantState:
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = _TenantState(self.quotas.get(tenant, self.default_quota))
+            self._tenants[tenant] = state
+        return state
+
+    def _expected_wait(self, position: int) -> float:
+        """Expected wait of the job at `position` in the queue (0 is next)."""
+        if self._running + position < self.max_running:
+            return 0.0
+        return math.ceil((position + 1) / self.max_running) * self.job_seconds
+
+    def _reject(self, reason: str, retry_after: float, tenant: str) -> RejectedError:
+        retry_after = max(retry_after, 1.0)
+        self._rejected += 1
+        metrics.increment("admission.rejected", reason=reason)
+        print(f"Admission rejected tenant '{tenant}': {reason}, retry after {retry_after:.0f} s")
+        return RejectedError(reason, retry_after)
+
+    def admit(self, tenant: str = "default") -> Ticket:
+        """
+        Check the quotas and reserve a place in the queue, without blocking.
+
+        Returns:
+            Ticket: Use it as a context manager around the job.
+
+        Raises:
+            RejectedError: The job must not be started now.
+        """
+        with self._cond:
+            state = self._tenant(tenant)
+            state.refill(time.monotonic())
+            if state.jobs >= state.quota.max_concurrent:
+                raise self._reject("tenant_concurrency", self.job_seconds, tenant)
+            if state.tokens < 1.0:
+                raise self._reject("rate", state.token_eta(), tenant)
+            if len(self._queue) >= self.max_queued:
+                raise self._reject("queue_full", self._expected_wait(len(self._queue)), tenant)
+            expected_wait = self._expected_wait(len(self._queue))
+            if expected_wait > self.max_queue_wait:
+                raise self._reject("queue_full", expected_wait, tenant)
+
+            state.tokens -= 1.0
+            state.jobs += 1
+            ticket = Ticket(self, tenant)
+            self._queue.append(ticket)
+            metrics.set_gauge("admission.queue_depth", len(self._queue))
+            return ticket
+
+    def _leave_queue(self, ticket: Ticket) -> None:
+        self._queue.remove(ticket)
+        self._tenant(ticket.tenant).jobs -= 1
+        ticket._released = True
+        metrics.set_gauge("admission.queue_depth", len(self._queue))
+        self._cond.notify_all()
+
+    def _notify(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def _wait_for_slot(self, ticket: Ticket) -> None:
+        deadline = ticket.enqueued + self.max_queue_wait
+        with self._cond:
+            unregister = ticket.cancel.on_cancel(self._notify) if ticket.cancel is not None else (lambda: None)
+            try:
+                while self._running >= self.max_running or self._queue[0] is not ticket:
+                    if ticket.cancel is not None and ticket.cancel.cancelled:
+                        self._leave_queue(ticket)
+                        metrics.increment("admission.cancelled")
+                        raise Cancelled(ticket.cancel.reason)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._leave_queue(ticket)
+                        raise self._reject("queue_timeout", self.job_seconds, ticket.tenant)
+                    self._cond.wait(remaining)
+            finally:
+                unregister()
+            self._queue.popleft()
+            self._running += 1
+            ticket.started = time.monotonic()
+            metrics.set_gauge("admission.queue_depth", len(self._queue))
+            metrics.set_gauge("admission.running", self._running)
+            # the next ticket may also have a free slot
+            self._cond.notify_all()
+        metrics.observe("admission.queue_seconds", ticket.started - ticket.enqueued)
+
+    def _release(self, ticket: Ticket) -> None:
+        with self._cond:
+            if ticket.started is None:
+                # admitted but never entered
+                self._queue.remove(ticket)
+                metrics.set_gauge("admission.queue_depth", len(self._queue))
+            else:
+                self._running -= 1
+                duration = time.monotonic() - ticket.started
+                self.job_seconds += self.smoothing * (duration - self.job_seconds)
+                metrics.observe("admission.job_seconds", duration)
+                metrics.set_gauge("admission.running", self._running)
+            self._tenant(ticket.tenant).jobs -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Current load of the service.
+        """
+        with self._cond:
+            return {
+                "running": self._running,
+                "queued": len(self._queue),
+                "rejected": self._rejected,
+                "job_seconds": self.job_seconds,
+                "expected_wait": self._expected_wait(len(self._queue)),
+            }
@@ -0,0 +1,314 @@
+import os
+import time
+import uuid
+import shutil
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+from .image_policy import encode_picture
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    finished REAL,
+    status TEXT NOT NULL,
+    description TEXT,
+    language TEXT,
+    path TEXT,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    suffix TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_blobs (
+    job_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (job_id, digest)
+);
+CREATE INDEX IF NOT EXISTS job_blobs_digest ON job_blobs (digest);
+"""
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        root: str,
+        max_age_days: Optional[float] = 30.0,
+        max_bytes: Optional[int] = 20 * 1024 ** 3,
+        gc_interval: float = 3600.0,
+        max_running_seconds: Optional[float] = 6 * 3600.0,
+    ):
+        """
+        Job outputs keyed by unique job IDs, with deduplicated images.
+
+        Every job gets its own folder `jobs/<job_id>/`, so concurrent jobs
+        never share files. Images are stored once under `blobs/` by the
+        SHA-256 of their encoded bytes and referenced by the jobs using them.
+        A SQLite index of jobs and blobs serves lookups of past runs and the
+        retention GC, which removes finished jobs older than `max_age_days`,
+        then the oldest ones until the store fits in `max_bytes`, then the
+        images no job references any more. Jobs still "running" after
+        `max_running_seconds` belonged to a process that died; the GC marks
+        them failed so they expire like other jobs.
+
+        Args:
+            root (str): Directory of the store, shared by every process using it.
+            max_age_days (Optional[float]): Age after which finished jobs are removed.
+            max_bytes (Optional[int]): Size the store is trimmed to.
+            gc_interval (float): Minimum seconds between two runs of `maybe_gc`.
+            max_running_seconds (Optional[float]): Age after which a running job
+                is taken as crashed, None to wait for every job forever.
+        """
+        self.root = root
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.gc_interval = gc_interval
+        self.max_running_seconds = max_running_seconds
+        self._last_gc = 0.0
+        self._local = threading.local()
+        os.makedirs(os.path.join(root, "jobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, "jobs", job_id)
+
+    def blob_path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}{suffix}")
+
+    def new_job(
+        self,
+        job_id: Optional[str] = None,
+        description: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> str:
+        """
+        Register a running job and create its folder.
+
+        Returns:
+            str: The job ID, a new UUID unless given.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO jobs (id, created, status, description, language) "
+            "VALUES (?, ?, 'running', ?, ?)",
+            (job_id, time.time(), description, language),
+        )
+        return job_id
+
+    def finish_job(self, job_id: str, status: str = "done", path: Optional[str] = None) -> None:
+        """
+        Record the outcome and disk usage of a job.
+        """
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, finished = ?, path = ?, bytes = ? WHERE id = ?",
+            (status, time.time(), path, _dir_size(self.job_dir(job_id)), job_id),
+        )
+
+    def discard_job(self, job_id: str, status: str = "cancelled") -> None:
+        """
+        Remove the partial output of a job that will not finish, including
+        images only it referenced, and keep its index entry with `status`.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM job_blobs WHERE job_id = ?", (job_id,))
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, path = NULL, bytes = 0 WHERE id = ?",
+                (status, time.time(), job_id),
+            )
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            self._delete_orphan_blobs(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def put_blob(self, data: bytes, suffix: str, job_id: Optional[str] = None) -> str:
+        """
+        Store bytes once by content and reference them from a job.
+
+        Returns:
+            str: Path of the stored file.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest, suffix)
+        conn = self._conn()
+        # the file is written inside the transaction so a concurrent GC cannot remove it
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (digest, suffix, bytes, created) VALUES (?, ?, ?, ?)",
+                (digest, suffix, len(data), time.time()),
+            )
+            if job_id is not None:
+                conn.execute("INSERT OR IGNORE INTO job_blobs (job_id, digest) VALUES (?, ?)", (job_id, digest))
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return path
+
+    def put_image(self, image: Image.Image, job_id: Optional[str] = None, quality: Optional[int] = None) -> str:
+        """
+        Store an image as PNG, or as JPEG of the given quality, deduplicated by content.
+
+        Returns:
+            str: Path of the stored file.
+        """
+        data, suffix = encode_picture(image, quality)
+        return self.put_blob(data, suffix, job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else dict(row)
+
+    def find(
+        self,
+        description: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """
+        Most recent jobs, optionally filtered by a description substring and status.
+        """
+        query, params = "SELECT * FROM jobs WHERE 1 = 1", []
+        if description:
+            query += " AND description LIKE ?"
+            params.append(f"%{description}%")
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._conn().execute(query, params)]
+
+    def popular_descriptions(self, limit: int = 20, since_days: Optional[float] = 30.0) -> List[Dict[str, Any]]:
+        """
+        Most requested descriptions among the finished jobs, with their count.
+        """
+        query, params = "SELECT description, language, COUNT(*) AS jobs FROM jobs WHERE status = 'done'", []
+        if since_days is not None:
+            query += " AND created >= ?"
+            params.append(time.time() - since_days * 86400)
+        query += " GROUP BY description, language ORDER BY jobs DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._conn().execute(query, params)]
+
+    def total_bytes(self) -> int:
+        conn = self._conn()
+        jobs = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM jobs").fetchone()[0]
+        blobs = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM blobs").fetchone()[0]
+        return jobs + blobs
+
+    def _delete_job(self, conn: sqlite3.Connection, job_id: str) -> None:
+        conn.execute("DELETE FROM job_blobs WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def _delete_orphan_blobs(self, conn: sqlite3.Connection) -> int:
+        orphans = conn.execute(
+            "SELECT digest, suffix FROM blobs WHERE digest NOT IN (SELECT digest FROM job_blobs)"
+        ).fetchall()
+        for row in orphans:
+            try:
+                os.remove(self.blob_path(row["digest"], row["suffix"]))
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM blobs WHERE digest = ?", (row["digest"],))
+        return len(orphans)
+
+    def gc(self, max_age_days: Optional[float] = None, max_bytes: Optional[int] = None) -> Dict[str, int]:
+        """
+        Mark stale running jobs failed, then remove expired jobs, the oldest
+        ones over the size limit and unreferenced images. Running jobs are
+        never removed.
+
+        Returns:
+            Dict[str, int]: Number of removed jobs and blobs, of jobs marked
+                failed, and the size left.
+        """
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        removed_jobs, removed_blobs, stale_jobs = 0, 0, 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.max_running_seconds is not None:
+                now = time.time()
+                stale_jobs = conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished = ? WHERE status = 'running' AND created < ?",
+                    (now, now - self.max_running_seconds),
+                ).rowcount
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                for row in conn.execute(
+                    "SELECT id FROM jobs WHERE status != 'running' AND created < ?", (cutoff,)
+                ).fetchall():
+                    self._delete_job(conn, row["id"])
+                    removed_jobs += 1
+            removed_blobs += self._delete_orphan_blobs(conn)
+
+            if max_bytes is not None:
+                oldest = conn.execute(
+                    "SELECT id FROM jobs WHERE status != 'running' ORDER BY created"
+                ).fetchall()
+                for row in oldest:
+                    if self.total_bytes() <= max_bytes:
+                        break
+                    self._delete_job(conn, row["id"])
+                    removed_jobs += 1
+                    removed_blobs += self._delete_orphan_blobs(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._last_gc = time.time()
+        if stale_jobs:
+            print(f"Artifact GC marked {stale_jobs} stale running job(s) failed")
+        if removed_jobs or removed_blobs:
+            print(f"Artifact GC removed {removed_jobs} job(s) and {removed_blobs} image(s)")
+        return {"jobs": removed_jobs, "blobs": removed_blobs, "stale": stale_jobs, "bytes": self.total_bytes()}
+
+    def maybe_gc(self) -> None:
+        """
+        Run the GC if it did not run in this process for `gc_interval` seconds.
+        """
+        if time.time() - self._last_gc >= self.gc_interval:
+            self.gc()
@@ -0,0 +1,118 @@
+import threading
+from typing import Any, Callable, List, Optional
+
+
+class Cancelled(BaseException):
+    """
+    Raised in a job whose CancelToken was cancelled.
+
+    Derives from BaseException like KeyboardInterrupt, so the fallbacks that
+    catch Exception around backend calls do not swallow it.
+    """
+
+
+class CancelToken:
+    def __init__(self):
+        """
+        Cooperative cancellation of one generation job.
+
+        The job checks the token between steps and waits on it instead of
+        sleeping. Backend clients register callbacks that abort their
+        in-flight requests, and schedulers drop the job's queued calls.
+        """
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Cancel the job and run the registered callbacks, once.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {e}")
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        Sleep for `timeout` seconds, or until the token is cancelled.
+
+        Raises:
+            Cancelled: The token was cancelled before or while waiting.
+        """
+        if self._event.wait(timeout):
+            raise Cancelled(self.reason)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run `callback` when the token is cancelled, at once if it already is.
+
+        Returns:
+            Callable[[], None]: Unregisters the callback, e.g. once the request
+                it would abort has finished.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def run_cancellable(fn: Callable[..., Any], cancel: Optional[CancelToken], *args, **kwargs) -> Any:
+    """
+    Run a blocking call, returning control as soon as the token is cancelled.
+
+    Without a token the function is called directly. Otherwise it runs in a
+    daemon thread which is abandoned on cancellation; the function should
+    check the token itself to stop early.
+
+    Raises:
+        Cancelled: The token was cancelled before the call finished.
+    """
+    if cancel is None:
+        return fn(*args, **kwargs)
+    cancel.raise_if_cancelled()
+
+    outcome = {}
+    finished = threading.Event()
+
+    def target():
+        try:
+            outcome["result"] = fn(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finished.set()
+
+    unregister = cancel.on_cancel(finished.set)
+    try:
+        threading.Thread(target=target, name="cancellable-call", daemon=True).start()
+        finished.wait()
+    finally:
+        unregister()
+    if "error" in outcome:
+        raise outcome["error"]
+    if "result" not in outcome:
+        raise Cancelled(cancel.reason)
+    return outcome["result"]
@@ -0,0 +1,156 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import metrics
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, backend: str, retry_after: float):
+        """
+        A backend call was refused because its circuit is open.
+
+        Args:
+            backend (str): Name of the backend.
+            retry_after (float): Seconds until the next probe is allowed.
+        """
+        super().__init__(f"Circuit of '{backend}' is open, retry after {retry_after:.0f} s.")
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        """
+        Circuit breaker around one backend, shared by every job of the process.
+
+        Closed: calls pass and consecutive failures are counted. After
+        `failure_threshold` of them the circuit opens, and calls fail at once
+        with CircuitOpenError instead of waiting for their own timeout. After
+        `recovery_timeout` seconds the circuit is half-open and lets
+        `half_open_max_calls` probe calls through: a success closes it again,
+        a failure opens it for another period.
+
+        Args:
+            name (str): Backend name used in errors, logs and metrics.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            recovery_timeout (float): Seconds the circuit stays open before probing.
+            half_open_max_calls (int): Probe calls allowed at once while half-open.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    def _set_state(self, state: str) -> None:
+        if state != self._state:
+            print(f"Circuit '{self.name}': {self._state} -> {state}")
+            self._state = state
+            metrics.set_gauge("circuit.state", _STATE_GAUGE[state], backend=self.name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Let a call through or refuse it.
+
+        Raises:
+            CircuitOpenError: The circuit is open, or half-open with all probes in flight.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                waited = time.monotonic() - self._opened_at
+                if waited < self.recovery_timeout:
+                    metrics.increment("circuit.rejected", backend=self.name)
+                    raise CircuitOpenError(self.name, self.recovery_timeout - waited)
+                self._set_state(HALF_OPEN)
+                self._probes = 0
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    metrics.increment("circuit.rejected", backend=self.name)
+                    raise CircuitOpenError(self.name, self.recovery_timeout)
+                self._probes += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._set_state(CLOSED)
+
+    def record_abandoned(self) -> None:
+        """
+        Forget a call that ended without an outcome, e.g. a cancelled one.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            metrics.increment("circuit.failures", backend=self.name)
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def call(self, fn: Callable[..., Any], *args, is_failure: Optional[Callable[[Any], bool]] = None, **kwargs) -> Any:
+        """
+        Run a backend call through the breaker.
+
+        Exceptions count as failures and are re-raised; `is_failure(result)`
+        flags backends that report errors in their return value.
+
+        Raises:
+            CircuitOpenError: The call was refused without reaching the backend.
+        """
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # cancelled or interrupted: says nothing about the backend
+            self.record_abandoned()
+            raise
+        if is_failure is not None and is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def wrap(self, fn: Callable[..., Any], is_failure: Optional[Callable[[Any], bool]] = None) -> Callable[..., Any]:
+        """
+        Wrap a backend callable so that every call goes through the breaker.
+        """
+        def guarded(*args, **kwargs):
+            return self.call(fn, *args, is_failure=is_failure, **kwargs)
+
+        return guarded
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+# Process-wide breakers, one per backend, shared by every job.
+llm_breaker = CircuitBreaker("llm", failure_threshold=5, recovery_timeout=30.0)
+image_breaker = CircuitBreaker("image", failure_threshold=3, recovery_timeout=60.0)
@@ -6,77 +6,407 @@ from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE
 
 import random
 import os
+import time
+from functools import lru_cache
+from io import BytesIO
 from PIL import Image
-from typing import List, Callable
+from typing import List, Callable, Optional, Tuple, Union
 
-from .llm_utils import llm_generate_titles, llm_generate_text, llm_generate_image_prompt, llm_generate_background_prompt
+from .llm_utils import (
+    DEFAULT_TITLES,
+    llm_generate_titles,
+    llm_generate_slide_text,
+    llm_generate_slide_texts,
+    llm_generate_speaker_notes,
+    llm_generate_image_prompt,
+    llm_generate_background_prompt,
+)
 from .prompt_configs import PromptConfig
 from .slides import generate_slide
 from .font import Font
+from .deadline import Deadline, DeadlineExceeded
+from .circuit_breaker import CircuitOpenError
+from .generate_image import placeholder_image
+from .report import GenerationReport
+from .image_policy import encode_picture, image_request
+from .prompt_budget import IMAGE_PROMPT_TOKEN_BUDGET, fit_prompt_to_budget
+from .profiling import NullProfiler, StageProfiler
+from .notes import NOTES_MODES, DeferredNotes, save_atomically
+from .cancellation import CancelToken
 
 import tqdm
 
 
+@lru_cache(maxsize=8)
+def _template_bytes(template: Optional[str]) -> bytes:
+    """Serialized template, read and validated once per process."""
+    buffer = BytesIO()
+    Presentation(template).save(buffer)
+    return buffer.getvalue()
+
+
+def new_presentation(template: Optional[str] = None) -> Presentation:
+    """Empty 16:9 presentation from the cached template (default python-pptx one if None)."""
+    presentation = Presentation(BytesIO(_template_bytes(template)))
+    presentation.slide_height = Inches(9)
+    presentation.slide_width = Inches(16)
+    return presentation
+
+
+def _fallback_picture(
+    generate_image: Callable[..., Image.Image],
+    prompt: Optional[str],
+    width: int,
+    height: int,
+    placeholder_images: bool,
+) -> Tuple[Optional[Image.Image], str]:
+    """Pick a replacement for an image that could not be generated in time."""
+    lookup = getattr(generate_image, 'lookup', None)
+    if prompt and lookup is not None:
+        cached = lookup(prompt, width, height)
+        if cached is not None:
+            return cached[0], 'cached image'
+    if placeholder_images:
+        return placeholder_image(width, height), 'placeholder image'
+    return None, 'image'
+
+
+def _seeded(llm_generate: Callable[..., str], seed: int) -> Callable[..., str]:
+    """Pass the job seed with every LLM call."""
+    def seeded_generate(prompt: str, **params) -> str:
+        return llm_generate(prompt, seed=seed, **params)
+
+    return seeded_generate
+
+
 def generate_presentation(
-    llm_generate: Callable[[str], str],
+    llm_generate: Callable[..., str],
     generate_image: Callable[[str, int, int], Image.Image],
     prompt_config: PromptConfig,
     description: str,
-    font: Font, 
+    font: Font,
     output_dir: str,
+    deadline: Optional[Union[float, Deadline]] = None,
+    placeholder_images: bool = False,
+    report: Optional[GenerationReport] = None,
+    profile: bool = False,
+    on_progress: Optional[Callable[[str, dict], None]] = None,
+    draft: bool = False,
+    template: Optional[str] = None,
+    image_quality: str = "high",
+    notes_mode: str = "inline",
+    save_picture: Optional[Callable[[Image.Image], str]] = None,
+    seed: Optional[int] = None,
+    images: bool = True,
+    batch_text: bool = False,
+    picture_quality: Optional[int] = None,
+    cancel: Optional[CancelToken] = None,
 ) -> Presentation:
-    """Generate a PowerPoint presentation based on a description using language and image models."""
-    os.makedirs(os.path.join(output_dir, 'pictures'), exist_ok=True)
-    presentation = Presentation()
-    presentation.slide_height = Inches(9)
-    presentation.slide_width = Inches(16)
+    """
+    Generate a PowerPoint presentation based on a description using language and image models.
+
+    With a deadline (Unix timestamp or Deadline), slides are degraded as it
+    approaches instead of running late: speaker notes are skipped first, then
+    images are replaced by cached or placeholder images, and finally slides
+    fall back to the plain text layout. The degraded slides are recorded in
+    `report` and written to report.json next to the presentation. Calls
+    refused by an open circuit breaker and failed image calls are degraded
+    the same way, without waiting.
+
+    With `profile`, a sampling CPU profile (profile.folded) and the wall time
+    and peak memory of every stage (profile_summary.json) are written next
+    to the presentation as well.
+
+    `on_progress(event, data)` is called as results arrive, with the events
+    "stage", "titles", "text", "draft", "image", "done" and "notes". With `draft`, a
+    text-only draft.pptx is saved as soon as the slide texts are ready.
+    `template` is an optional .pptx file the deck is built on.
+    `image_quality` ("draft", "standard" or "high") selects the resolution and
+    step count requested from the image backend, see image_policy. When
+    `generate_image` has a `generate_images` attribute (see
+    PresentationGenerator.backends), the images of all slides are requested
+    in one batch once their prompts are ready.
+
+    `notes_mode` controls speaker notes: "inline" writes them with the slide
+    text, "skip" leaves them out, and "deferred" delivers the deck without
+    them and then adds them in a background thread (`report.notes_job`),
+    saving the deck again in place and emitting a final "notes" event.
+
+    `save_picture(picture)` stores a slide picture and returns its path, e.g.
+    ArtifactStore.put_image; pictures go to `output_dir/pictures` by default.
+
+    With `seed`, every random decision (image aspects and slide layouts) comes
+    from one per-job RNG, each image request gets a seed derived from it and
+    every LLM call gets `seed`, and the deck is saved with fixed zip
+    timestamps, so the same seed and backend answers give byte-identical
+    decks. Degradation under a deadline remains timing dependent.
+
+    Without `images`, no image prompts or images are requested and slides get
+    placeholder pictures. With `batch_text`, the text of all slides is written
+    in one LLM call. `picture_quality` embeds pictures as JPEG of that
+    quality instead of PNG. See profiles for the combinations in use.
+
+    `cancel` is checked before every step, and the deferred notes stop with
+    it; Cancelled is raised out of this function, leaving partial output for
+    the caller to remove. Backend callables should be bound to the same
+    token (see PresentationGenerator.backends) to abort in-flight calls.
+    """
+    if notes_mode not in NOTES_MODES:
+        raise ValueError(f"Unknown notes mode {notes_mode!r}, expected one of {NOTES_MODES}.")
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    if report is None:
+        report = GenerationReport()
+    profiler = StageProfiler() if profile else NullProfiler()
+    emit = on_progress or (lambda event, data: None)
+    rng = random.Random(seed)
+    if seed is not None:
+        llm_generate = _seeded(llm_generate, seed)
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        if save_picture is None:
+            os.makedirs(os.path.join(output_dir, 'pictures'), exist_ok=True)
+        presentation = new_presentation(template)
+
+        pbar = tqdm.tqdm(total=4, desc="Presentation goes brrr...")
+
+        # Time kept back for packing and saving the deck
+        def pack_reserve(num_slides: int) -> float:
+            return 1.0 + deadline.estimate('pack') * num_slides
+
+        def check_cancelled() -> None:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+
+        pbar.set_description("Generating titles for presentation")
+        check_cancelled()
+        emit('stage', {'stage': 'titles'})
+        with profiler.stage('titles'):
+            try:
+                titles = deadline.call(
+                    'titles', llm_generate_titles, llm_generate, description, prompt_config,
+                    reserve=pack_reserve(len(DEFAULT_TITLES)),
+                )
+            except (DeadlineExceeded, CircuitOpenError):
+                titles = list(DEFAULT_TITLES)
+                report.degrade(-1, 'titles')
+        emit('titles', {'titles': titles})
+        pbar.update(1)
+
+        pbar.set_description("Generating text for slides")
+        check_cancelled()
+        emit('stage', {'stage': 'text'})
+        with profiler.stage('text'):
+            texts = []
+            image_budget = 0.0
+            if images:
+                image_budget = (deadline.estimate('image_prompt') + deadline.estimate('image')) * len(titles)
+            batch_texts = None
+            if batch_text:
+                try:
+                    batch_texts = deadline.call(
+                        'texts', llm_generate_slide_texts, llm_generate, description, titles, prompt_config,
+                        reserve=pack_reserve(len(titles)),
+                    )
+                except (DeadlineExceeded, CircuitOpenError):
+                    pass
+            for t_index, title in enumerate(titles):
+                check_cancelled()
+                reserve = pack_reserve(len(titles))
+                try:
+                    if batch_texts is not None:
+                        text = batch_texts[t_index]
+                    else:
+                        text = deadline.call(
+                            'text', llm_generate_slide_text, llm_generate, description, title, prompt_config,
+                            reserve=reserve,
+                        )
+                except (DeadlineExceeded, CircuitOpenError):
+                    text = ''
+                    report.degrade(t_index, 'text')
+
+                # speaker notes are dropped first, keeping time for the images
+                notes = None
+                if notes_mode == 'inline' and deadline.allows('notes', reserve=reserve + image_budget):
+                    try:
+                        notes = deadline.call(
+                            'notes', llm_generate_speaker_notes, llm_generate, title, prompt_config,
+                            reserve=reserve + image_budget,
+                        )
+                    except (DeadlineExceeded, CircuitOpenError):
+                        pass
+                if notes is None and notes_mode == 'inline':
+                    report.degrade(t_index, 'notes')
+                texts.append((text, notes))
+                emit('text', {'index': t_index, 'title': title, 'text': text})
+        pbar.update(1)
+
+        if draft:
+            # Text-only deck users can download while images are generated
+            draft_presentation = new_presentation(template)
+            for title, text in zip(titles, texts):
+                generate_slide(presentation=draft_presentation, title=title, text=text, font=font)
+            draft_path = os.path.join(output_dir, 'draft.pptx')
+            draft_presentation.save(draft_path)
+            emit('draft', {'path': draft_path})
+
+        # Generate images for all slides
+        pbar.set_description("Generating images for slides")
+        check_cancelled()
+        emit('stage', {'stage': 'images'})
+        picture_paths = []
+        tokens_trimmed, prompts_trimmed = 0, 0
+        generate_images = getattr(generate_image, 'generate_images', None)
+        with profiler.stage('images'):
+            # image prompts of every slide first, so the images can go out as one batch
+            image_requests = []
+            for t_index, title in enumerate(titles):
+                check_cancelled()
+                image_params = image_request(rng.choice(['portrait', 'square']), image_quality)
+                if seed is not None:
+                    image_params['seed'] = rng.randrange(2 ** 31)
+                reserve = pack_reserve(len(titles))
+                caption_prompt = None
+                if not images:
+                    image_requests.append((caption_prompt, image_params))
+                    continue
+                try:
+                    if not deadline.allows('image_prompt', 'image', reserve=reserve):
+                        raise DeadlineExceeded("No time left for the slide image.")
+                    caption_prompt = deadline.call(
+                        'image_prompt', llm_generate_image_prompt,
+                        llm_generate, description, title, prompt_config,
+                        reserve=reserve,
+                    )
+                    if not caption_prompt:
+                        raise ValueError("The LLM returned no image prompt.")
+                    # the text encoder drops everything past its window anyway
+                    caption_prompt, trimmed = fit_prompt_to_budget(caption_prompt, IMAGE_PROMPT_TOKEN_BUDGET)
+                    tokens_trimmed += trimmed
+                    prompts_trimmed += trimmed > 0
+                except Exception as e:
+                    if not isinstance(e, (DeadlineExceeded, CircuitOpenError)):
+                        print(f"Image prompt failed for slide {t_index}: {e}")
+                    caption_prompt = None
+                image_requests.append((caption_prompt, image_params))
+
+            pictures = [None] * len(titles)
+            pending = [i for i, (caption_prompt, _) in enumerate(image_requests) if caption_prompt]
+            reserve = pack_reserve(len(titles))
+            if generate_images is not None and pending:
+                try:
+                    if not deadline.allows('image_batch', reserve=reserve):
+                        raise DeadlineExceeded("No time left for the slide images.")
+                    common = {
+                        k: v for k, v in image_requests[pending[0]][1].items()
+                        if k not in ('width', 'height', 'seed')
+                    }
+                    batch = deadline.call(
+                        'image_batch', generate_images,
+                        [image_requests[i][0] for i in pending],
+                        [(image_requests[i][1]['width'], image_requests[i][1]['height']) for i in pending],
+                        seeds=[image_requests[i][1].get('seed') for i in pending],
+                        **common,
+                        reserve=reserve,
+                    )
+                    for t_index, picture in zip(pending, batch):
+                        pictures[t_index] = picture
+                except Exception as e:
+                    # deadline, open circuit or failed batch: every slide falls back below
+                    if not isinstance(e, (DeadlineExceeded, CircuitOpenError)):
+                        print(f"Image batch of {len(pending)} slides failed: {e}")
+            elif pending:
+                for t_index in pending:
+                    check_cancelled()
+                    caption_prompt, image_params = image_requests[t_index]
+                    try:
+                        if not deadline.allows('image', reserve=reserve):
+                            raise DeadlineExceeded("No time left for the slide image.")
+                        pictures[t_index] = deadline.call(
+                            'image', generate_image,
+                            prompt=caption_prompt,
+                            **image_params,
+                            reserve=reserve,
+                        )
+                    except Exception as e:
+                        # deadline, open circuit or failed backend call: fall back right away
+                        if not isinstance(e, (DeadlineExceeded, CircuitOpenError)):
+                            print(f"Image generation failed for slide {t_index}: {e}")
+
+            for t_index, (picture, (caption_prompt, image_params)) in enumerate(zip(pictures, image_requests)):
+                if picture is None and not images:
+                    picture = placeholder_image(image_params['width'], image_params['height'])
+                elif picture is None:
+                    picture, degraded = _fallback_picture(
+                        generate_image, caption_prompt, image_params['width'], image_params['height'],
+                        placeholder_images,
+                    )
+                    report.degrade(t_index, degraded)
+
+                picture_path = None
+                if picture is not None and save_picture is not None:
+                    picture_path = save_picture(picture)
+                elif picture is not None:
+                    data, suffix = encode_picture(picture, picture_quality)
+                    picture_path = os.path.join(output_dir, 'pictures', f'{t_index:06}{suffix}')
+                    with open(picture_path, 'wb') as f:
+                        f.write(data)
+                picture_paths.append(picture_path)
+                emit('image', {'index': t_index, 'path': picture_path})
+        report.stats['image_prompts'] = {
+            'token_budget': IMAGE_PROMPT_TOKEN_BUDGET,
+            'tokens_trimmed': tokens_trimmed,
+            'prompts_trimmed': prompts_trimmed,
+        }
+        pbar.update(1)
+
+        pbar.set_description("Packing presentation")
+        check_cancelled()
+        emit('stage', {'stage': 'packing'})
+
+        # Slides without a picture use the plain text layout
+        with profiler.stage('packing'):
+            for title, text, picture_path in zip(titles, texts, picture_paths):
+                check_cancelled()
+                start = time.time()
+                generate_slide(
+                    presentation=presentation,
+                    title=title,
+                    text=text,
+                    picture_path=picture_path,
+                    background_path=None,  # No backgrounds used
+                    font=font,
+                    rng=rng,
+                )
+                deadline.record('pack', time.time() - start)
+        pbar.update(1)
+
+        check_cancelled()
+        pbar.set_description("Done")
+        with profiler.stage('save'):
+            output_path = os.path.join(output_dir, 'presentation.pptx')
+            save_atomically(presentation, output_path, reproducible=seed is not None)
+        if profile:
+            profiler.write(output_dir)
+            report.stats['profile'] = profiler.summary()
+        report.stats['notes'] = {'mode': notes_mode, 'status': 'pending' if notes_mode == 'deferred' else 'done'}
+        report_path = os.path.join(output_dir, 'report.json')
+        report.save(report_path)
+        if report.degraded:
+            print(f"Deadline reached, degraded slides: {report.degraded_slides}")
+        emit('done', {'path': output_path})
+    finally:
+        # also on failure or cancellation, tracing must not outlive the job
+        profiler.stop()
 
-    pbar = tqdm.tqdm(total=4, desc="Presentation goes brrr...")
-    
-    pbar.set_description("Generating titles for presentation")
-    titles = llm_generate_titles(llm_generate, description, prompt_config)
-    pbar.update(1)
-    
-    pbar.set_description("Generating text for slides")
-    texts = llm_generate_text(llm_generate, description, titles, prompt_config)
-    pbar.update(1)
-    
-    # Generate images for all slides
-    pbar.set_description("Generating images for slides")
-    picture_paths = []
-    for t_index, (title, text) in enumerate(zip(titles, texts)):
-        image_width, image_height = random.choice([(768, 1344), (1024, 1024)])
-        caption_prompt = llm_generate_image_prompt(
-            llm_generate, 
-            description, 
-            title, 
-            prompt_config
-        )
-        picture = generate_image(
-            prompt=caption_prompt, 
-            width=image_width, 
-            height=image_height
-        )
-        picture_path = os.path.join(output_dir, 'pictures', f'{t_index:06}.png')
-        picture.save(picture_path)
-        picture_paths.append(picture_path)
-    pbar.update(1)
-    
-    pbar.set_description("Packing presentation")
-    
-    # Generate slides - all slides will have text and image
-    for title, text, picture_path in zip(titles, texts, picture_paths):
-        generate_slide(
-            presentation=presentation,
-            title=title,
-            text=text,
-            picture_path=picture_path,
-            background_path=None,  # No backgrounds used
-            font=font,
-        )
-    pbar.update(1)
-    
-    pbar.set_description("Done")
-    output_path = os.path.join(output_dir, 'presentation.pptx')
-    presentation.save(output_path)
-    return presentation
\ No newline at end of file
+    if notes_mode == 'deferred':
+        report.notes_job = DeferredNotes(
+            llm_generate, prompt_config, titles, presentation, output_path,
+            report=report,
+            report_path=report_path,
+            on_done=lambda job: emit('notes', {'path': job.path, 'status': job.status}),
+            reproducible=seed is not None,
+            cancel=cancel,
+        ).start()
+    return presentation
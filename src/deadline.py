@@ -0,0 +1,108 @@
+import math
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Initial guesses in seconds for one call of each kind, refined as calls complete.
+DEFAULT_ESTIMATES = {
+    "titles": 2.0,
+    "text": 2.0,
+    "texts": 4.0,
+    "notes": 3.0,
+    "image_prompt": 2.0,
+    "image": 15.0,
+    "image_batch": 30.0,
+    "pack": 0.2,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call cannot finish before the deadline."""
+
+
+class Deadline:
+    def __init__(self, at: Optional[float] = None, smoothing: float = 0.5):
+        """
+        End-to-end time limit of a generation job.
+
+        Keeps a running estimate of how long each kind of backend call takes,
+        so the pipeline can decide what still fits into the remaining time.
+
+        Args:
+            at (Optional[float]): Unix timestamp of the deadline, None for no limit.
+            smoothing (float): Weight of the latest observation in the estimates.
+        """
+        self.at = at
+        self.smoothing = smoothing
+        self.estimates: Dict[str, float] = dict(DEFAULT_ESTIMATES)
+
+    @classmethod
+    def after(cls, seconds: Optional[float]) -> "Deadline":
+        """
+        Deadline the given number of seconds from now, None for no limit.
+        """
+        return cls(None if seconds is None else time.time() + seconds)
+
+    @property
+    def enabled(self) -> bool:
+        return self.at is not None
+
+    def remaining(self) -> float:
+        if self.at is None:
+            return math.inf
+        return self.at - time.time()
+
+    def estimate(self, kind: str) -> float:
+        return self.estimates.get(kind, 0.0)
+
+    def record(self, kind: str, seconds: float) -> None:
+        previous = self.estimates.get(kind, seconds)
+        self.estimates[kind] = (1 - self.smoothing) * previous + self.smoothing * seconds
+
+    def allows(self, *kinds: str, reserve: float = 0.0) -> bool:
+        """
+        Whether calls of the given kinds are expected to finish while still
+        leaving `reserve` seconds before the deadline.
+        """
+        needed = sum(self.estimate(kind) for kind in kinds)
+        return self.remaining() - reserve >= needed
+
+    def call(self, kind: str, fn: Callable[..., Any], *args, reserve: float = 0.0, **kwargs) -> Any:
+        """
+        Run a blocking call, giving up once only `reserve` seconds are left.
+
+        Without a deadline the function is called directly. Otherwise it runs
+        in a daemon thread, which is abandoned if it does not finish in time.
+
+        Raises:
+            DeadlineExceeded: If the call does not finish in time.
+        """
+        start = time.time()
+        if self.at is None:
+            result = fn(*args, **kwargs)
+            self.record(kind, time.time() - start)
+            return result
+
+        timeout = self.remaining() - reserve
+        if timeout <= 0:
+            raise DeadlineExceeded(f"No time left for '{kind}'.")
+
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = fn(*args, **kwargs)
+            except BaseException as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, name=f"deadline-{kind}", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            # count the overrun so later estimates become more conservative
+            self.record(kind, time.time() - start)
+            raise DeadlineExceeded(f"'{kind}' did not finish before the deadline.")
+        self.record(kind, time.time() - start)
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
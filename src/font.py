@@ -12,6 +12,8 @@ class Font:
             max_size (int): Maximum font size to use for fitting text.
         """
         self.fonts_dir = fonts_dir
+        # scanned once, copies of this object share the listing
+        self._filenames = frozenset(os.listdir(fonts_dir))
         self.font_name = None  # Default font
         self.set_random_font()
         self.max_size = max_size
@@ -28,16 +30,19 @@ class Font:
         else:
             raise ValueError(f"Font '{font_name}' not found in '{self.fonts_dir}'.")
 
-    def set_random_font(self) -> None:
+    def set_random_font(self, rng: Optional[random.Random] = None) -> None:
         """
         Set a random font from the fonts directory. The chosen font must have both
         basic and bold styles available.
+
+        Args:
+            rng (Optional[random.Random]): Source of randomness, for reproducible runs.
         """
         available_fonts = self._find_available_fonts()
         if not available_fonts:
             raise ValueError("No fonts with both basic and bold styles found.")
 
-        self.font_name = random.choice(available_fonts)
+        self.font_name = (rng or random).choice(available_fonts)
 
     @property
     def basic(self) -> Optional[str]:
@@ -93,10 +98,8 @@ class Font:
         if not font_name.endswith(".ttf"):
             font_name = f'{font_name}.ttf'
             
-        for filename in os.listdir(self.fonts_dir):
-            if font_name == filename:
-                file_path = os.path.join(self.fonts_dir, filename)
-                return file_path
+        if font_name in self._filenames:
+            return os.path.join(self.fonts_dir, font_name)
         return None
 
     def _find_available_fonts(self) -> list:
@@ -109,15 +112,15 @@ class Font:
                     that have both basic and bold styles.
         """
         fonts = set()
-        for filename in os.listdir(self.fonts_dir):
+        for filename in self._filenames:
             if filename.endswith(".ttf"):
                 font_name = filename[:-4]  # Remove the .ttf extension
                 if font_name.endswith("Bd"):
                     basic_font = font_name[:-2]
-                    if os.path.exists(os.path.join(self.fonts_dir, f"{basic_font}.ttf")):
+                    if f"{basic_font}.ttf" in self._filenames:
                         fonts.add(basic_font)
                 else:
                     bold_font = f"{font_name}Bd"
-                    if os.path.exists(os.path.join(self.fonts_dir, f"{bold_font}.ttf")):
+                    if f"{bold_font}.ttf" in self._filenames:
                         fonts.add(font_name)
-        return list(fonts)
\ No newline at end of file
+        return sorted(fonts)
\ No newline at end of file
@@ -1,67 +1,314 @@
 import time
+import base64
+import threading
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from typing import List, Optional, Sequence, Tuple
 from io import BytesIO
 from PIL import Image
 import os
+import json
 from dotenv import load_dotenv
 
+from .cancellation import CancelToken, run_cancellable
+
 # Load environment variables
 load_dotenv()
 
 # Get API token from environment variables
 HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
 
-def api_sd_generate(
+SD_API_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-3-medium-diffusers"
+
+# Base URL of a local image server (see image_server), used instead of the inference API when set
+IMAGE_SERVER_URL = os.getenv("IMAGE_SERVER_URL")
+
+
+class ImageClient:
+    def __init__(
+        self,
+        api_url: str = SD_API_URL,
+        api_token: Optional[str] = None,
+        pool_size: int = 8,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        http2: bool = False,
+        min_interval: float = 7.0,
+        chunk_size: int = 64 * 1024,
+        batch_url: Optional[str] = None,
+    ):
+        """
+        Long-lived client for the Hugging Face inference API that keeps its
+        connections alive between images.
+
+        Args:
+            api_url (str): Inference endpoint of the diffusion model.
+            api_token (Optional[str]): Hugging Face token, defaults to
+                HUGGINGFACE_API_TOKEN from the environment.
+            pool_size (int): Maximum number of pooled keep-alive connections.
+            connect_timeout (float): Seconds to wait for a connection.
+            read_timeout (float): Seconds to wait between bytes of the response.
+            http2 (bool): Use HTTP/2 through httpx (requires the `h2` package).
+            min_interval (float): Minimum number of seconds between two requests,
+                to stay under the rate limit of the free inference tier.
+            chunk_size (int): Size of the chunks streamed into the image buffer.
+            batch_url (Optional[str]): Endpoint taking several prompts in one
+                request, see image_server; without it batches are sent one
+                image at a time.
+        """
+        self.api_url = api_url
+        self.batch_url = batch_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.http2 = http2
+        self.min_interval = min_interval
+        self.chunk_size = chunk_size
+        self.headers = {
+            "Authorization": f"Bearer {api_token or HUGGINGFACE_API_TOKEN}",
+            "Content-Type": "application/json",
+        }
+
+        self._rate_lock = threading.Lock()
+        self._last_request = 0.0
+
+        if http2:
+            import httpx
+            self._session = httpx.Client(
+                http2=True,
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=pool_size,
+                    max_keepalive_connections=pool_size,
+                ),
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+        else:
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+
+    def _wait_for_rate_limit(self, cancel: Optional[CancelToken] = None) -> None:
+        # reserve the next free start time, then wait outside the lock so a
+        # cancelled caller stops waiting without holding up the others
+        with self._rate_lock:
+            start = max(time.monotonic(), self._last_request + self.min_interval)
+            self._last_request = start
+        delay = start - time.monotonic()
+        if delay <= 0:
+            return
+        if cancel is None:
+            time.sleep(delay)
+        else:
+            cancel.wait(delay)
+
+    def _post(self, payload: dict, url: Optional[str] = None, cancel: Optional[CancelToken] = None) -> BytesIO:
+        """
+        Send the request and stream the response body into a buffer.
+        Cancelling `cancel` closes the response, aborting the download.
+        """
+        url = url or self.api_url
+        buffer = BytesIO()
+        unregister = lambda: None
+        try:
+            if self.http2:
+                with self._session.stream("POST", url, json=payload) as response:
+                    if cancel is not None:
+                        unregister = cancel.on_cancel(response.close)
+                    if response.status_code != 200:
+                        response.read()
+                        print(f"Error Status Code: {response.status_code}")
+                        print(f"Response Content: {response.text}")
+                    response.raise_for_status()
+                    for chunk in response.iter_bytes(self.chunk_size):
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        buffer.write(chunk)
+            else:
+                with self._session.post(
+                    url,
+                    json=payload,
+                    timeout=self.timeout,
+                    stream=True,
+                ) as response:
+                    if cancel is not None:
+                        unregister = cancel.on_cancel(response.close)
+                    if response.status_code != 200:
+                        print(f"Error Status Code: {response.status_code}")
+                        print(f"Response Content: {response.text}")
+                    response.raise_for_status()
+                    for chunk in response.iter_content(self.chunk_size):
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        buffer.write(chunk)
+        finally:
+            # also on errors, the token outlives this request
+            unregister()
+        if cancel is not None:
+            # a response closed by the token may end early without an error
+            cancel.raise_if_cancelled()
+        buffer.seek(0)
+        return buffer
+
+    def generate(
+        self,
+        prompt: str,
+        width: Optional[int] = 1024,
+        height: Optional[int] = 1024,
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
+        seed: Optional[int] = None,
+        cancel: Optional[CancelToken] = None
+    ) -> Image.Image:
+        """
+        Generate an image using stable-diffusion-3-medium via Hugging Face's inference API.
+
+        Args:
+            prompt (str): The text prompt for image generation
+            width (Optional[int]): Image width in pixels
+            height (Optional[int]): Image height in pixels
+            negative_prompt (Optional[str]): What the image should not contain
+            num_inference_steps (Optional[int]): Number of denoising steps
+            guidance_scale (Optional[float]): Classifier-free guidance scale
+            seed (Optional[int]): Seed of the sampler for reproducible images
+            cancel (Optional[CancelToken]): Aborts the wait and the request when cancelled
+
+        Returns:
+            PIL.Image: Generated image
+        """
+        payload = _payload(prompt, width, height, negative_prompt, num_inference_steps, guidance_scale, seed)
+
+        self._wait_for_rate_limit(cancel)
+        try:
+            image = Image.open(run_cancellable(self._post, cancel, payload, None, cancel))
+            # decode now, the image may be shared between coalesced callers
+            image.load()
+            return image
+        except Exception as e:
+            print(f"Error generating image with Hugging Face API: {e}")
+            raise
+
+    __call__ = generate
+
+    def generate_images(
+        self,
+        prompts: Sequence[str],
+        sizes: Sequence[Tuple[int, int]],
+        seeds: Optional[Sequence[Optional[int]]] = None,
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> List[Image.Image]:
+        """
+        Generate several images in one request.
+
+        With a `batch_url` the prompts are sent together, so the server can
+        run them through the model as one batch. Otherwise they are sent one
+        after the other, as the inference API takes a single prompt.
+
+        Args:
+            prompts (Sequence[str]): Text prompts, one per image.
+            sizes (Sequence[Tuple[int, int]]): (width, height) of every image.
+            seeds (Optional[Sequence[Optional[int]]]): Sampler seed of every image.
+            negative_prompt (Optional[str]): What the images should not contain
+            num_inference_steps (Optional[int]): Number of denoising steps
+            guidance_scale (Optional[float]): Classifier-free guidance scale
+            cancel (Optional[CancelToken]): Aborts the wait and the request when cancelled
+
+        Returns:
+            List[PIL.Image]: Generated images in the order of `prompts`.
+        """
+        seeds = list(seeds) if seeds is not None else [None] * len(prompts)
+        if self.batch_url is None:
+            return [
+                self.generate(prompt, width, height, negative_prompt, num_inference_steps, guidance_scale, seed, cancel)
+                for prompt, (width, height), seed in zip(prompts, sizes, seeds)
+            ]
+
+        payload = {
+            "items": [
+                _payload(prompt, width, height, negative_prompt, num_inference_steps, guidance_scale, seed)
+                for prompt, (width, height), seed in zip(prompts, sizes, seeds)
+            ]
+        }
+        self._wait_for_rate_limit(cancel)
+        try:
+            encoded = json.load(run_cancellable(self._post, cancel, payload, self.batch_url, cancel))["images"]
+            images = []
+            for data in encoded:
+                image = Image.open(BytesIO(base64.b64decode(data)))
+                image.load()
+                images.append(image)
+            return images
+        except Exception as e:
+            print(f"Error generating a batch of {len(prompts)} images: {e}")
+            raise
+
+    def close(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        self._session.close()
+
+
+def _payload(
     prompt: str,
-    width: Optional[int] = 1024,
-    height: Optional[int] = 1024,
-    negative_prompt: Optional[str] = None
-) -> Image.Image:
+    width: Optional[int],
+    height: Optional[int],
+    negative_prompt: Optional[str],
+    num_inference_steps: Optional[int],
+    guidance_scale: Optional[float],
+    seed: Optional[int],
+) -> dict:
+    parameters = {
+        "width": width,
+        "height": height,
+        "negative_prompt": negative_prompt,
+        "num_inference_steps": num_inference_steps,
+        "guidance_scale": guidance_scale,
+        "seed": seed,
+    }
+    return {
+        "inputs": prompt,
+        # parameters left as None use the backend defaults
+        "parameters": {k: v for k, v in parameters.items() if v is not None},
+    }
+
+
+def local_image_client(server_url: str, **options) -> ImageClient:
+    """
+    Client of a local image server started with `python -m src.image_server`.
+
+    Args:
+        server_url (str): Base URL of the server, e.g. http://localhost:8008.
+        **options: Further ImageClient arguments.
     """
-    Generate an image using FLUX.1-dev via Hugging Face's inference API.
-    
+    server_url = server_url.rstrip("/")
+    options.setdefault("min_interval", 0.0)
+    return ImageClient(api_url=f"{server_url}/generate", batch_url=f"{server_url}/generate_batch", **options)
+
+
+def placeholder_image(width: int = 1024, height: int = 1024) -> Image.Image:
+    """
+    Neutral vertical gradient used when no generated image is available.
+
     Args:
-        prompt (str): The text prompt for image generation
-        
+        width (int): Image width in pixels.
+        height (int): Image height in pixels.
+
     Returns:
-        PIL.Image: Generated image
+        PIL.Image: Placeholder image
     """
-    API_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-3-medium-diffusers"
-    headers = {
-        "Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    print("Hugging Face API token loaded")
-    
-    # Prepare the payload (simplified for FLUX.1-dev)
-    payload = {
-        "inputs": prompt
-    }
+    top, bottom = (236, 239, 244), (176, 186, 201)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    return Image.composite(
+        Image.new("RGB", (width, height), bottom),
+        Image.new("RGB", (width, height), top),
+        gradient,
+    )
+
 
-    try:
-        # Make the API request
-        response = requests.post(API_URL, headers=headers, json=payload)
-        time.sleep(7)
-        print("Request made to Hugging Face API")
-        
-        # Print debug information if the request fails
-        if response.status_code != 200:
-            print(f"Error Status Code: {response.status_code}")
-            print(f"Response Content: {response.text}")
-        
-        response.raise_for_status()  # Raise an exception for bad status codes
-
-        print("Response received from Hugging Face API")
-        
-        # Convert the response to an image
-        image = Image.open(BytesIO(response.content))
-        
-        return image
-    
-    except requests.exceptions.RequestException as e:
-        print(f"Error making request to Hugging Face API: {e}")
-        raise
-    except Exception as e:
-        print(f"Error processing image: {e}")
-        raise
\ No newline at end of file
+# Process-wide client; drop-in replacement for the former function.
+api_sd_generate = local_image_client(IMAGE_SERVER_URL) if IMAGE_SERVER_URL else ImageClient()
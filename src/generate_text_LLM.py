@@ -1,7 +1,10 @@
 import os
 from groq import Groq
 from dotenv import load_dotenv
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
+
+from .llm_utils import LLM_ERROR_RESPONSE
+from .cancellation import CancelToken
 
 print(f"Loading environment variables...")
 load_dotenv()
@@ -27,7 +30,11 @@ class LLMClient:
         prompt: str, 
         max_tokens: int = 2048,
         temperature: float = 0.87,
-        top_p: float = 0.47
+        top_p: float = 0.47,
+        stop: Optional[List[str]] = None,
+        seed: Optional[int] = None,
+        call_type: Optional[str] = None,
+        cancel: Optional[CancelToken] = None
     ) -> str:
         """
         Generate text using the Llama 3.1 model.
@@ -37,10 +44,18 @@ class LLMClient:
             max_tokens (int): Maximum number of tokens in the response.
             temperature (float): Sampling temperature for creativity.
             top_p (float): Nucleus sampling probability threshold.
+            stop (Optional[List[str]]): Up to 4 sequences that end generation.
+            seed (Optional[int]): Seed for best-effort reproducible sampling.
+            call_type (Optional[str]): Kind of call, used by ModelRouter to pick
+                a model; ignored here.
+            cancel (Optional[CancelToken]): When given, the answer is streamed and
+                the request is closed as soon as the token is cancelled.
 
         Returns:
             str: Generated text.
         """
+        if cancel is not None:
+            return self._generate_cancellable(prompt, max_tokens, temperature, top_p, stop, seed, cancel)
         try:
             completion = self.client.chat.completions.create(
                 model=self.model_version,
@@ -53,6 +68,8 @@ class LLMClient:
                 temperature=temperature,
                 max_tokens=max_tokens,
                 top_p=top_p,
+                stop=stop,
+                seed=seed,
                 stream=False
             )
             print(f"Generated text: {completion.choices[0].message.content}")
@@ -61,4 +78,53 @@ class LLMClient:
         
         except Exception as e:
             print(f"Error generating response: {e}")
-            return "Error occurred while generating response"
\ No newline at end of file
+            return LLM_ERROR_RESPONSE
+
+    def _generate_cancellable(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        top_p: float,
+        stop: Optional[List[str]],
+        seed: Optional[int],
+        cancel: CancelToken,
+    ) -> str:
+        cancel.raise_if_cancelled()
+        unregister = lambda: None
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model_version,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                stop=stop,
+                seed=seed,
+                stream=True
+            )
+            # closing the connection also stops the generation on the server
+            unregister = cancel.on_cancel(stream.response.close)
+            parts = []
+            for chunk in stream:
+                cancel.raise_if_cancelled()
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+            cancel.raise_if_cancelled()
+            text = "".join(parts)
+            print(f"Generated text: {text}")
+            return text
+
+        except Exception as e:
+            # reading from a closed stream fails, report the cancellation instead
+            cancel.raise_if_cancelled()
+            print(f"Error generating response: {e}")
+            return LLM_ERROR_RESPONSE
+        finally:
+            unregister()
+
+    def close(self) -> None:
+        """
+        Close the HTTP connections of the Groq client.
+        """
+        self.client.close()
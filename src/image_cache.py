@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import uuid
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Mersenne prime used by the MinHash permutations; keeps a*x+b below 2**63.
+_PRIME = (1 << 31) - 1
+
+# Generation parameters besides the size that change the image; a cached
+# image is only served for the same values.
+SAMPLER_PARAMS = ("seed", "num_inference_steps", "guidance_scale", "negative_prompt")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Lowercase a prompt, drop punctuation and collapse whitespace.
+    """
+    prompt = prompt.lower()
+    prompt = re.sub(r"[^\w\s]", " ", prompt)
+    return " ".join(prompt.split())
+
+
+def prompt_shingles(prompt: str, size: int = 2) -> Set[str]:
+    """
+    Set of word shingles of a prompt. Single words are included as well, so
+    very short prompts still produce a usable set.
+    """
+    tokens = normalize_prompt(prompt).split()
+    shingles = set(tokens)
+    for i in range(len(tokens) - size + 1):
+        shingles.add(" ".join(tokens[i:i + size]))
+    return shingles
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class PromptImageCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 2,
+    ):
+        """
+        On-disk image cache that also serves near-duplicate prompts.
+
+        Prompts are indexed with MinHash signatures split into LSH bands.
+        Candidates that share a band are verified with the exact Jaccard
+        similarity of their shingle sets. Images are only served for the
+        same size and sampler settings (SAMPLER_PARAMS). Images generated
+        with a seed are only served for the identical prompt as well, so a
+        seeded deck does not depend on what else is in the cache.
+
+        Args:
+            cache_dir (str): Directory holding the images and the index file.
+            threshold (float): Minimum Jaccard similarity to serve a cached image.
+            num_perm (int): Number of MinHash permutations.
+            bands (int): Number of LSH bands; must divide num_perm.
+            shingle_size (int): Number of words per shingle.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hits = 0
+        self.misses = 0
+
+        rng = np.random.RandomState(0)
+        self._a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._shingles: Dict[str, Set[str]] = {}
+        self._buckets: Dict[Tuple[int, int, tuple, int, bytes], List[str]] = {}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, "index.jsonl")
+        self._load_index()
+
+    def _signature(self, shingles: Set[str]) -> np.ndarray:
+        if not shingles:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        hashes = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                for s in shingles
+            ],
+            dtype=np.uint64,
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray, width: int, height: int, sampler: Dict[str, Any]):
+        settings = tuple(sampler.get(name) for name in SAMPLER_PARAMS)
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield (width, height, settings, band, rows.tobytes())
+
+    def _insert(self, entry: dict) -> None:
+        shingles = prompt_shingles(entry["prompt"], self.shingle_size)
+        self._entries[entry["id"]] = entry
+        self._shingles[entry["id"]] = shingles
+        signature = self._signature(shingles)
+        for key in self._band_keys(signature, entry["width"], entry["height"], entry):
+            self._buckets.setdefault(key, []).append(entry["id"])
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if os.path.exists(os.path.join(self.cache_dir, entry["file"])):
+                    self._insert(entry)
+
+    def lookup(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        **sampler: Any,
+    ) -> Optional[Tuple[Image.Image, float]]:
+        """
+        Find a cached image whose prompt is similar enough to the given one.
+
+        Args:
+            prompt (str): Image prompt.
+            width (int): Requested image width.
+            height (int): Requested image height.
+            **sampler: Requested SAMPLER_PARAMS, matched exactly; a seeded
+                request only matches an image of the same prompt.
+
+        Returns:
+            Optional[Tuple[Image.Image, float]]: The image and the similarity
+                of its prompt, or None on a miss.
+        """
+        shingles = prompt_shingles(prompt, self.shingle_size)
+        signature = self._signature(shingles)
+        best_id, best_score = None, 0.0
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature, width, height, sampler):
+                candidates.update(self._buckets.get(key, ()))
+            if sampler.get("seed") is not None:
+                candidates = {entry_id for entry_id in candidates if self._entries[entry_id]["prompt"] == prompt}
+            for entry_id in candidates:
+                score = jaccard(shingles, self._shingles[entry_id])
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None or best_score < self.threshold:
+                return None
+            entry = self._entries[best_id]
+
+        image = Image.open(os.path.join(self.cache_dir, entry["file"]))
+        image.load()
+        return image, best_score
+
+    def add(
+        self,
+        prompt: str,
+        width: int,
+        height: int,
+        image: Image.Image,
+        **sampler: Any,
+    ) -> None:
+        """
+        Store a generated image under its prompt, size and SAMPLER_PARAMS.
+        """
+        entry_id = uuid.uuid4().hex
+        entry = {
+            "id": entry_id,
+            "prompt": prompt,
+            "width": width,
+            "height": height,
+            "file": f"{entry_id}.png",
+        }
+        entry.update({name: sampler[name] for name in SAMPLER_PARAMS if sampler.get(name) is not None})
+        image.save(os.path.join(self.cache_dir, entry["file"]))
+        with self._lock:
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._insert(entry)
+
+    def wrap(self, generate_image: Callable[..., Image.Image]) -> Callable[..., Image.Image]:
+        """
+        Wrap an image generation function so that near-duplicate prompts
+        are served from the cache.
+
+        Args:
+            generate_image (Callable[..., Image.Image]): Function with the
+                signature of `api_sd_generate`.
+
+        Returns:
+            Callable[..., Image.Image]: Function with the same signature.
+        """
+        def cached_generate_image(
+            prompt: str,
+            width: int = 1024,
+            height: int = 1024,
+            **kwargs,
+        ) -> Image.Image:
+            sampler = {name: kwargs.get(name) for name in SAMPLER_PARAMS}
+            cached = self.lookup(prompt, width, height, **sampler)
+            if cached is not None:
+                image, similarity = cached
+                self.hits += 1
+                print(f"Image cache hit (similarity {similarity:.2f}) for prompt: {prompt[:80]}")
+                return image
+            self.misses += 1
+            image = generate_image(prompt=prompt, width=width, height=height, **kwargs)
+            self.add(prompt, width, height, image, **sampler)
+            return image
+
+        cached_generate_image.lookup = self.lookup
+        return cached_generate_image
+
+    def wrap_batch(self, generate_images: Callable[..., List[Image.Image]]) -> Callable[..., List[Image.Image]]:
+        """
+        Wrap a batch image generation function so that cached prompts are
+        served from the cache and only the misses are sent, as one batch.
+
+        Args:
+            generate_images (Callable[..., List[Image.Image]]): Function with
+                the signature of `ImageClient.generate_images`.
+
+        Returns:
+            Callable[..., List[Image.Image]]: Function with the same signature.
+        """
+        def cached_generate_images(
+            prompts: Sequence[str],
+            sizes: Sequence[Tuple[int, int]],
+            seeds: Optional[Sequence[Optional[int]]] = None,
+            **kwargs,
+        ) -> List[Image.Image]:
+            images: List[Optional[Image.Image]] = [None] * len(prompts)
+            seeds = list(seeds) if seeds is not None else [None] * len(prompts)
+            # everything but the seed is shared by the images of a batch
+            sampler = {name: kwargs.get(name) for name in SAMPLER_PARAMS if name != "seed"}
+            missing = []
+            for index, (prompt, (width, height), seed) in enumerate(zip(prompts, sizes, seeds)):
+                cached = self.lookup(prompt, width, height, seed=seed, **sampler)
+                if cached is None:
+                    missing.append(index)
+                    continue
+                images[index], similarity = cached
+                self.hits += 1
+                print(f"Image cache hit (similarity {similarity:.2f}) for prompt: {prompt[:80]}")
+            if missing:
+                self.misses += len(missing)
+                generated = generate_images(
+                    [prompts[i] for i in missing],
+                    [sizes[i] for i in missing],
+                    seeds=[seeds[i] for i in missing],
+                    **kwargs,
+                )
+                for index, image in zip(missing, generated):
+                    width, height = sizes[index]
+                    self.add(prompts[index], width, height, image, seed=seeds[index], **sampler)
+                    images[index] = image
+            return images
+
+        return cached_generate_images
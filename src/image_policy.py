@@ -0,0 +1,94 @@
+import math
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+# Width / height of the pictures the image slides accept (square or vertical).
+ASPECT_RATIOS = {
+    "square": 1.0,
+    "portrait": 768 / 1344,
+}
+
+# Pictures of image slides span the full slide height, in inches.
+SLIDE_HEIGHT_INCHES = 9
+
+DEFAULT_NEGATIVE_PROMPT = "text, letters, watermark, logo, caption, blurry"
+
+# Pixel density on the slide, pixel budget and sampler settings per quality.
+# "high" reproduces the former fixed sizes (768x1344 and 1024x1024).
+QUALITY_PROFILES = {
+    "draft": {"dpi": 64, "max_pixels": 512 * 896, "steps": 12, "guidance_scale": 5.0},
+    "standard": {"dpi": 96, "max_pixels": 896 * 896, "steps": 20, "guidance_scale": 6.0},
+    "high": {"dpi": 150, "max_pixels": 1024 * 1024, "steps": 28, "guidance_scale": 7.0},
+}
+
+
+def _round_to(value: float, multiple: int) -> int:
+    return max(multiple, int(round(value / multiple)) * multiple)
+
+
+def image_request(
+    aspect: str,
+    quality: str = "high",
+    multiple: int = 64,
+    min_side: int = 512,
+) -> Dict[str, Any]:
+    """
+    Smallest adequate generation parameters for a picture of an image slide.
+
+    The pixel height is derived from the slide height and the target density
+    of the quality profile, capped by its pixel budget and rounded to the
+    latent grid of the diffusion model.
+
+    Args:
+        aspect (str): "square" or "portrait".
+        quality (str): "draft", "standard" or "high".
+        multiple (int): Both sides are multiples of this value.
+        min_side (int): Smallest side the model renders well.
+
+    Returns:
+        Dict[str, Any]: width, height, num_inference_steps, guidance_scale and
+            negative_prompt, ready to be passed to `generate_image`.
+    """
+    ratio = ASPECT_RATIOS[aspect]
+    profile = QUALITY_PROFILES[quality]
+
+    height = SLIDE_HEIGHT_INCHES * profile["dpi"]
+    height = min(height, math.sqrt(profile["max_pixels"] / ratio))
+    width = height * ratio
+    if min(width, height) < min_side:
+        scale = min_side / min(width, height)
+        width, height = width * scale, height * scale
+
+    # round down when needed so the pixel budget holds after rounding
+    width, height = _round_to(width, multiple), _round_to(height, multiple)
+    while width * height > profile["max_pixels"] and min(width, height) > min_side:
+        width, height = _round_to((height - multiple) * ratio, multiple), height - multiple
+
+    return {
+        "width": width,
+        "height": height,
+        "num_inference_steps": profile["steps"],
+        "guidance_scale": profile["guidance_scale"],
+        "negative_prompt": DEFAULT_NEGATIVE_PROMPT,
+    }
+
+
+def encode_picture(image: Image.Image, quality: Optional[int] = None) -> Tuple[bytes, str]:
+    """
+    Encode a slide picture for embedding in the deck.
+
+    Args:
+        image (Image.Image): The picture.
+        quality (Optional[int]): JPEG quality from 1 to 95, None for lossless PNG.
+
+    Returns:
+        Tuple[bytes, str]: The encoded picture and its file suffix.
+    """
+    buffer = BytesIO()
+    if quality is None:
+        image.save(buffer, format="PNG")
+        return buffer.getvalue(), ".png"
+    image.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue(), ".jpg"
@@ -0,0 +1,291 @@
+"""
+Local image server that batches concurrent requests into one model call.
+
+Requests arriving within `--max-wait-ms` of each other are collected, up to
+`--max-batch-size`, and the ones sharing size and sampler settings go
+through the model together. A diffusion model on a GPU takes about as long
+for a small batch as for one image, so batching raises throughput without
+slowing down a lone request by more than the wait window.
+
+The API mirrors the Hugging Face inference API, so ImageClient works with it:
+    POST /generate        {"inputs": prompt, "parameters": {...}} -> PNG
+    POST /generate_batch  {"items": [{"inputs": ..., "parameters": ...}]} -> {"images": [base64 PNG]}
+    GET  /health          batching statistics
+
+Usage:
+    python -m src.image_server --model stand-in --port 8008
+    python -m src.image_server --model kandinsky-community/kandinsky-3 --device cuda
+    IMAGE_SERVER_URL=http://localhost:8008 python main.py ...
+"""
+import base64
+import asyncio
+import hashlib
+import argparse
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from io import BytesIO
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from pydantic import BaseModel
+from fastapi import FastAPI
+from fastapi.responses import Response
+
+from .metrics import metrics
+
+
+class StandInModel:
+    def __init__(self, seconds_per_step: float = 0.0):
+        """
+        CPU stand-in for a diffusion model, for development and load tests.
+
+        Renders a smooth colour field determined by the prompt and seed. A
+        call sleeps `seconds_per_step` per denoising step whatever the batch
+        size, like a model whose batch runs in parallel on the GPU.
+
+        Args:
+            seconds_per_step (float): Simulated time of one denoising step.
+        """
+        self.seconds_per_step = seconds_per_step
+
+    def generate(
+        self,
+        prompts: List[str],
+        width: int,
+        height: int,
+        seeds: List[Optional[int]],
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
+    ) -> List[Image.Image]:
+        if self.seconds_per_step:
+            time.sleep(self.seconds_per_step * (num_inference_steps or 28))
+        images = []
+        for prompt, seed in zip(prompts, seeds):
+            digest = hashlib.sha256(f"{prompt}\0{seed}".encode("utf-8")).digest()
+            rng = np.random.RandomState(int.from_bytes(digest[:4], "little"))
+            grid = rng.randint(0, 256, size=(4, 4, 3), dtype=np.uint8)
+            images.append(Image.fromarray(grid, "RGB").resize((width, height), Image.BICUBIC))
+        return images
+
+
+class DiffusersModel:
+    def __init__(self, model_id: str, device: str = "cuda"):
+        """
+        Text-to-image pipeline from the diffusers library, e.g. Kandinsky 3.
+
+        Args:
+            model_id (str): Hugging Face model ID of the pipeline.
+            device (str): Torch device the pipeline runs on.
+        """
+        import torch
+        from diffusers import AutoPipelineForText2Image
+
+        self.torch = torch
+        self.device = device
+        dtype = torch.float16 if device.startswith("cuda") else torch.float32
+        self.pipeline = AutoPipelineForText2Image.from_pretrained(model_id, torch_dtype=dtype).to(device)
+
+    def generate(
+        self,
+        prompts: List[str],
+        width: int,
+        height: int,
+        seeds: List[Optional[int]],
+        negative_prompt: Optional[str] = None,
+        num_inference_steps: Optional[int] = None,
+        guidance_scale: Optional[float] = None,
+    ) -> List[Image.Image]:
+        generators = [
+            self.torch.Generator(self.device).manual_seed(seed if seed is not None else int(time.time_ns() % 2 ** 31))
+            for seed in seeds
+        ]
+        options = {"num_inference_steps": num_inference_steps, "guidance_scale": guidance_scale}
+        return self.pipeline(
+            prompt=prompts,
+            negative_prompt=[negative_prompt] * len(prompts) if negative_prompt else None,
+            width=width,
+            height=height,
+            generator=generators,
+            **{k: v for k, v in options.items() if v is not None},
+        ).images
+
+
+class MicroBatcher:
+    def __init__(self, model: Any, max_batch_size: int = 8, max_wait: float = 0.02):
+        """
+        Collects single image requests into batches for one model call.
+
+        A worker thread takes the oldest request, waits up to `max_wait`
+        seconds for more, and runs every group of requests with the same
+        size and sampler settings as one batch.
+
+        Args:
+            model (Any): Object with the `generate` signature of StandInModel.
+            max_batch_size (int): Most images per model call.
+            max_wait (float): Seconds the oldest request waits for company.
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.images = 0
+        self._queue: Deque[Tuple[Dict[str, Any], Future]] = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt: str, **parameters: Any) -> Future:
+        """
+        Queue one image request.
+
+        Returns:
+            Future: Resolves to the generated PIL image.
+        """
+        future: Future = Future()
+        with self._cond:
+            self._queue.append((dict(parameters, prompt=prompt), future))
+            self._cond.notify()
+        return future
+
+    def _collect(self) -> List[Tuple[Dict[str, Any], Future]]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            taken = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch_size))]
+        # a request whose client went away was cancelled; the rest can no longer be
+        return [(request, future) for request, future in taken if future.set_running_or_notify_cancel()]
+
+    def _run(self) -> None:
+        while True:
+            groups: Dict[tuple, List[Tuple[Dict[str, Any], Future]]] = {}
+            for request, future in self._collect():
+                key = tuple(
+                    request.get(name)
+                    for name in ("width", "height", "negative_prompt", "num_inference_steps", "guidance_scale")
+                )
+                groups.setdefault(key, []).append((request, future))
+            for (width, height, negative_prompt, steps, guidance_scale), group in groups.items():
+                try:
+                    self._generate(group, width, height, negative_prompt, steps, guidance_scale)
+                except Exception as e:
+                    # the worker is the only one, it must survive any batch
+                    print(f"Batch of {len(group)} images failed: {e}")
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+
+    def _generate(self, group, width, height, negative_prompt, steps, guidance_scale) -> None:
+        start = time.time()
+        try:
+            images = self.model.generate(
+                [request["prompt"] for request, _ in group],
+                width or 1024,
+                height or 1024,
+                [request.get("seed") for request, _ in group],
+                negative_prompt=negative_prompt,
+                num_inference_steps=steps,
+                guidance_scale=guidance_scale,
+            )
+        except Exception as e:
+            print(f"Batch of {len(group)} images failed: {e}")
+            for _, future in group:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.images += len(group)
+        metrics.observe("image_server.batch_seconds", time.time() - start)
+        metrics.increment("image_server.images", len(group))
+        for (_, future), image in zip(group, images):
+            future.set_result(image)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._queue),
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": self.images / self.batches if self.batches else 0.0,
+        }
+
+
+class Parameters(BaseModel):
+    width: Optional[int] = 1024
+    height: Optional[int] = 1024
+    negative_prompt: Optional[str] = None
+    num_inference_steps: Optional[int] = None
+    guidance_scale: Optional[float] = None
+    seed: Optional[int] = None
+
+
+class GenerateRequest(BaseModel):
+    inputs: str
+    parameters: Parameters = Parameters()
+
+
+class BatchRequest(BaseModel):
+    items: List[GenerateRequest]
+
+
+def _png(image: Image.Image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def create_app(batcher: MicroBatcher) -> FastAPI:
+    app = FastAPI(title="Slide image server")
+
+    async def generate_one(request: GenerateRequest) -> Image.Image:
+        future = batcher.submit(request.inputs, **request.parameters.model_dump())
+        return await asyncio.wrap_future(future)
+
+    @app.post("/generate")
+    async def generate(request: GenerateRequest) -> Response:
+        image = await generate_one(request)
+        return Response(content=_png(image), media_type="image/png")
+
+    @app.post("/generate_batch")
+    async def generate_batch(request: BatchRequest) -> Dict[str, List[str]]:
+        # queued one by one, so they can share model calls with other clients' requests
+        images = await asyncio.gather(*(generate_one(item) for item in request.items))
+        return {"images": [base64.b64encode(_png(image)).decode("ascii") for image in images]}
+
+    @app.get("/health")
+    async def health() -> Dict[str, Any]:
+        return batcher.stats()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a text-to-image model with request micro-batching.")
+    parser.add_argument("--model", default="stand-in", help='"stand-in" or a diffusers model ID')
+    parser.add_argument("--device", default="cuda", help="Torch device of a diffusers model")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20.0, help="How long a request waits for a batch")
+    parser.add_argument("--seconds-per-step", type=float, default=0.0, help="Simulated step time of the stand-in")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    if args.model == "stand-in":
+        model = StandInModel(seconds_per_step=args.seconds_per_step)
+    else:
+        model = DiffusersModel(args.model, device=args.device)
+    batcher = MicroBatcher(model, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
+    uvicorn.run(create_app(batcher), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
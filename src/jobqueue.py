@@ -0,0 +1,184 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+# Job states: queued -> running -> done, or back to queued until max_attempts is reached.
+STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobQueue:
+    def __init__(self, path: str, lease_seconds: float = 120.0, max_attempts: int = 3):
+        """
+        Durable job queue in a SQLite file, shared by worker processes.
+
+        A worker claims a job with a lease and must renew it with heartbeats.
+        Jobs whose lease expired (the worker died or hung) are handed to the
+        next worker, up to `max_attempts` attempts in total. Every state change
+        is one short write transaction, so any number of processes on hosts
+        sharing the file can use the queue without a broker. The default
+        rollback journal is kept because WAL does not work on network
+        filesystems.
+
+        Args:
+            path (str): SQLite database file, created if missing.
+            lease_seconds (float): How long a claim is valid without a heartbeat.
+            max_attempts (int): Attempts before a job is marked as failed.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread, in autocommit mode with explicit transactions."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    @staticmethod
+    def _job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+        """
+        Add a job.
+
+        Args:
+            payload (Dict[str, Any]): JSON-serializable job description.
+            job_id (Optional[str]): Job ID, a new UUID by default.
+
+        Returns:
+            str: The job ID.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, payload, status, created, updated) VALUES (?, ?, 'queued', ?, ?)",
+            (job_id, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        return job_id
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'lease expired', worker = NULL, updated = ? "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+            (now, now, self.max_attempts),
+        )
+        expired = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, updated = ? "
+            "WHERE status = 'running' AND lease_until < ?",
+            (now, now),
+        ).rowcount
+        if expired:
+            print(f"Requeued {expired} abandoned job(s)")
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest queued job, after requeueing abandoned ones.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job, or None if the queue is empty.
+        """
+        now = time.time()
+        conn = self._transaction()
+        try:
+            self._requeue_expired(conn, now)
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                    "lease_until = ?, updated = ? WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return None if row is None else self.get(row["id"])
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """
+        Renew the lease of a running job.
+
+        Returns:
+            bool: False if the job is no longer leased to this worker.
+        """
+        now = time.time()
+        return self._conn().execute(
+            "UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (now + self.lease_seconds, now, job_id, worker_id),
+        ).rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Mark a job as done.
+
+        Returns:
+            bool: False if the lease was lost and the job belongs to another worker.
+        """
+        return self._conn().execute(
+            "UPDATE jobs SET status = 'done', result = ?, lease_until = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id),
+        ).rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """
+        Report a failed attempt; the job is retried until max_attempts is reached.
+
+        Returns:
+            bool: False if the lease was lost and the job belongs to another worker.
+        """
+        return self._conn().execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "error = ?, worker = NULL, lease_until = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (self.max_attempts, error, time.time(), job_id, worker_id),
+        ).rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._job(self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Number of jobs per status.
+        """
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
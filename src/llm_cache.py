@@ -0,0 +1,94 @@
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from .llm_utils import LLM_ERROR_RESPONSE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    namespace TEXT,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class LLMCache:
+    def __init__(self, path: str, max_age_days: Optional[float] = 7.0):
+        """
+        On-disk cache of LLM completions keyed by model, prompt and generation
+        parameters, shared by every process using the same file.
+
+        Args:
+            path (str): SQLite database file, created if missing.
+            max_age_days (Optional[float]): Completions older than this are
+                regenerated, None to keep them forever.
+        """
+        self.path = path
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(namespace: Hashable, prompt: str, params: dict) -> str:
+        payload = json.dumps([str(namespace), prompt, params], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        query, args = "SELECT response FROM completions WHERE key = ?", [key]
+        if self.max_age_days is not None:
+            query += " AND created >= ?"
+            args.append(time.time() - self.max_age_days * 86400)
+        row = self._conn().execute(query, args).fetchone()
+        if row is None:
+            return None
+        self._conn().execute("UPDATE completions SET hits = hits + 1 WHERE key = ?", (key,))
+        return row[0]
+
+    def put(self, key: str, namespace: Hashable, prompt: str, response: str) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO completions (key, namespace, prompt, response, created) VALUES (?, ?, ?, ?, ?)",
+            (key, str(namespace), prompt, response, time.time()),
+        )
+
+    def wrap(self, llm_generate: Callable[..., str], namespace: Hashable = None) -> Callable[..., str]:
+        """
+        Wrap a text generation function so that repeated prompts are served
+        from the cache. Error responses are never cached.
+
+        Args:
+            llm_generate (Callable[..., str]): Function with the signature of
+                `LLMClient.generate`.
+            namespace (Hashable): Extra key part, e.g. the model name.
+
+        Returns:
+            Callable[..., str]: Function with the same signature.
+        """
+        def cached_generate(prompt: str, **params: Any) -> str:
+            key = self.key(namespace, prompt, params)
+            response = self.get(key)
+            if response is not None:
+                self.hits += 1
+                return response
+            self.misses += 1
+            response = llm_generate(prompt, **params)
+            if response != LLM_ERROR_RESPONSE:
+                self.put(key, namespace, prompt, response)
+            return response
+
+        return cached_generate
@@ -1,9 +1,29 @@
+import re
 from typing import List, Callable
 
 from src.prompt_configs import PromptConfig, prefix
 
+DEFAULT_TITLES = ["Introduction", "Main Content", "Conclusion"]
+
+# Returned by LLMClient.generate instead of raising when the API call fails.
+LLM_ERROR_RESPONSE = "Error occurred while generating response"
+
+
+def _labelled_answer(answer: str) -> str:
+    """
+    Text after the first `prefix` label, up to the next labelled line: that
+    one is an echoed few-shot example, left over when the backend does not
+    honour the stop sequences.
+    """
+    lowered = answer.lower()
+    if prefix not in lowered:
+        return answer
+    start = lowered.index(prefix) + len(prefix)
+    end = lowered.find("\n" + prefix.strip(), start)
+    return answer[start:] if end < 0 else answer[start:end]
+
 def llm_generate_titles(
-    llm_generate: Callable[[str], str], 
+    llm_generate: Callable[..., str], 
     description: str, 
     prompt_config: PromptConfig,
 ) -> List[str]:
@@ -13,7 +33,7 @@ def llm_generate_titles(
     prompt = prompt_config.title_prompt.format(
         description=description
     )
-    titles_str = llm_generate(prompt)
+    titles_str = llm_generate(prompt, call_type='title', **prompt_config.params_for('title'))
     titles = []
     
     # Split by newline and process each title
@@ -61,12 +81,106 @@ def llm_generate_titles(
     # Ensure we have at least a few titles
     if len(titles) < 3:
         print("Warning: Few titles generated. Using default titles.")
-        titles = ["Introduction", "Main Content", "Conclusion"]
+        titles = list(DEFAULT_TITLES)
     
     return titles
 
+def llm_generate_slide_text(
+    llm_generate: Callable[..., str], 
+    description: str, 
+    title: str, 
+    prompt_config: PromptConfig
+) -> str:
+    """
+    Generate the body text of a slide using a language model.
+
+    Args:
+        llm_generate (Callable[..., str]): Function to generate text using a language model.
+        description (str): Description of the presentation.
+        title (str): Slide title.
+        prompt_config (PromptConfig): Configuration for prompts.
+
+    Returns:
+        str: Slide text.
+    """
+    text_query = prompt_config.text_prompt.format(description=description, title=title)
+    text = llm_generate(text_query, call_type='text', **prompt_config.params_for('text'))
+    if text == LLM_ERROR_RESPONSE:
+        return ''
+    if prefix in text.lower():
+        text = _labelled_answer(text)
+        text = text.replace('\n', '')
+    return text
+
+def llm_generate_slide_texts(
+    llm_generate: Callable[..., str], 
+    description: str, 
+    titles: List[str], 
+    prompt_config: PromptConfig
+) -> List[str]:
+    """
+    Generate the body text of all slides with a single language model call.
+
+    Slides the answer does not cover, e.g. when the list is cut short, are
+    written one by one with `llm_generate_slide_text`.
+
+    Args:
+        llm_generate (Callable[..., str]): Function to generate text using a language model.
+        description (str): Description of the presentation.
+        titles (List[str]): Slide titles.
+        prompt_config (PromptConfig): Configuration for prompts.
+
+    Returns:
+        List[str]: Slide texts in the order of `titles`.
+    """
+    if prompt_config.texts_prompt is None:
+        return [llm_generate_slide_text(llm_generate, description, title, prompt_config) for title in titles]
+
+    numbered_titles = "\n".join(f"{index + 1}. {title}" for index, title in enumerate(titles))
+    query = prompt_config.texts_prompt.format(description=description, titles=numbered_titles)
+    answer = llm_generate(query, call_type='texts', **prompt_config.params_for('texts'))
+    texts = {}
+    if answer != LLM_ERROR_RESPONSE:
+        for line in answer.split("\n"):
+            match = re.match(r"\s*(\d+)[.)]\s*(.+)", line)
+            if match is None:
+                continue
+            text = match.group(2).strip()
+            if text.lower().startswith(prefix):
+                text = text[len(prefix):].strip()
+            texts.setdefault(int(match.group(1)) - 1, text)
+    return [
+        texts.get(index) or llm_generate_slide_text(llm_generate, description, title, prompt_config)
+        for index, title in enumerate(titles)
+    ]
+
+def llm_generate_speaker_notes(
+    llm_generate: Callable[..., str], 
+    title: str, 
+    prompt_config: PromptConfig
+) -> str:
+    """
+    Generate speaker notes for a slide using a language model.
+
+    Args:
+        llm_generate (Callable[..., str]): Function to generate text using a language model.
+        title (str): Slide title.
+        prompt_config (PromptConfig): Configuration for prompts.
+
+    Returns:
+        str: Speaker notes.
+    """
+    notes_query = f"Generate speaker notes for the slide titled '{title}'. Do not include introductory sentences like 'content may include, speaker notes may include etc.'. The notes should expand on the slide content, providing additional context and information in continuous text format. Avoid instructions or suggestions for speaking or presenting. Do not keep it too long."
+    notes = llm_generate(notes_query, call_type='notes', **prompt_config.params_for('notes'))
+    if notes == LLM_ERROR_RESPONSE:
+        return ''
+    if prefix in notes.lower():
+        notes = notes[notes.lower().index(prefix)+len(prefix):]
+        notes = notes.replace('\n', '')
+    return notes
+
 def llm_generate_text(
-    llm_generate: Callable[[str], str], 
+    llm_generate: Callable[..., str], 
     description: str, 
     titles: List[str], 
     prompt_config: PromptConfig
@@ -79,25 +193,13 @@ def llm_generate_text(
     """
     texts_and_notes = []
     for title in titles:
-        # Generate slide text
-        text_query = prompt_config.text_prompt.format(description=description, title=title)
-        text = llm_generate(text_query)
-        if prefix in text.lower():
-            text = text[text.lower().index(prefix)+len(prefix):]
-            text = text.replace('\n', '')
-
-        # Generate speaker notes
-        notes_query = f"Generate speaker notes for the slide titled '{title}'. Do not include introductory sentences like 'content may include, speaker notes may include etc.'. The notes should expand on the slide content, providing additional context and information in continuous text format. Avoid instructions or suggestions for speaking or presenting. Do not keep it too long."
-        notes = llm_generate(notes_query)
-        if prefix in notes.lower():
-            notes = notes[notes.lower().index(prefix)+len(prefix):]
-            notes = notes.replace('\n', '')
-
+        text = llm_generate_slide_text(llm_generate, description, title, prompt_config)
+        notes = llm_generate_speaker_notes(llm_generate, title, prompt_config)
         texts_and_notes.append((text, notes))
     return texts_and_notes
 
 def llm_generate_image_prompt(
-    llm_generate: Callable[[str], str], 
+    llm_generate: Callable[..., str], 
     description: str, 
     title: str, 
     prompt_config: PromptConfig
@@ -106,7 +208,7 @@ def llm_generate_image_prompt(
     Generate an image prompt for a slide using a language model.
 
     Args:
-        llm_generate (Callable[[str], str]): Function to generate text using a language model.
+        llm_generate (Callable[..., str]): Function to generate text using a language model.
         description (str): Description of the presentation.
         title (str): Slide title.
         prompt_config (PromptConfig): Configuration for prompts.
@@ -115,14 +217,15 @@ def llm_generate_image_prompt(
         str: Image prompt.
     """
     query = prompt_config.image_prompt.format(description=description, title=title)
-    prompt = llm_generate(query)
-    if prefix in prompt: 
-        prompt = prompt[prompt.lower().index(prompt)+len(prompt):]
-        prompt = prompt.replace('\n', '')
+    prompt = llm_generate(query, call_type='image', **prompt_config.params_for('image'))
+    if prompt == LLM_ERROR_RESPONSE:
+        return ''
+    prompt = _labelled_answer(prompt)
+    prompt = prompt.replace('\n', ' ')
     return prompt
 
 def llm_generate_background_prompt(
-    llm_generate: Callable[[str], str], 
+    llm_generate: Callable[..., str], 
     description: str, 
     title: str, 
     prompt_config: PromptConfig, 
@@ -132,7 +235,7 @@ def llm_generate_background_prompt(
     Generate a background prompt for a slide using a language model.
 
     Args:
-        llm_generate (Callable[[str], str]): Function to generate text using a language model.
+        llm_generate (Callable[..., str]): Function to generate text using a language model.
         description (str): Description of the presentation.
         title (str): Slide title.
         prompt_config (PromptConfig): Configuration for prompts.
@@ -142,7 +245,7 @@ def llm_generate_background_prompt(
     """
     query = prompt_config.background_prompt.format(description=description, title=title)
     
-    keywords = llm_generate(query)
+    keywords = llm_generate(query, call_type='background', **prompt_config.params_for('background'))
     background_prompt = f'{keywords}, {background_style}'
         
     return background_prompt
\ No newline at end of file
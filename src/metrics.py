@@ -0,0 +1,63 @@
+import threading
+from typing import Any, Dict
+
+
+def _key(metric: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return metric
+    label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{metric}{{{label_str}}}"
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Thread-safe in-process registry of counters, gauges and timings.
+        """
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, metric: str, value: float = 1, **labels) -> None:
+        key = _key(metric, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, metric: str, value: float, **labels) -> None:
+        key = _key(metric, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, metric: str, seconds: float, **labels) -> None:
+        key = _key(metric, labels)
+        with self._lock:
+            timing = self._timings.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Copy of all metrics; timings include their mean.
+        """
+        with self._lock:
+            timings = {
+                key: dict(timing, mean=timing["sum"] / timing["count"])
+                for key, timing in self._timings.items()
+            }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+# Process-wide registry shared by all components.
+metrics = Metrics()
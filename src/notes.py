@@ -0,0 +1,158 @@
+import os
+import time
+import zipfile
+import threading
+from io import BytesIO
+from typing import Callable, List, Optional
+
+from pptx import Presentation
+
+from .llm_utils import llm_generate_speaker_notes
+from .prompt_configs import PromptConfig
+from .report import GenerationReport
+from .circuit_breaker import CircuitOpenError
+from .cancellation import CancelToken, Cancelled
+
+NOTES_MODES = ("inline", "deferred", "skip")
+
+# Earliest timestamp a zip entry can hold.
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def _normalized_zip(data: bytes) -> bytes:
+    """Rewrite a .pptx with fixed entry timestamps, the only varying bytes of a save."""
+    output = BytesIO()
+    with zipfile.ZipFile(BytesIO(data)) as source, \
+            zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            entry = zipfile.ZipInfo(info.filename, date_time=_ZIP_EPOCH)
+            entry.compress_type = zipfile.ZIP_DEFLATED
+            entry.external_attr = info.external_attr
+            target.writestr(entry, source.read(info))
+    return output.getvalue()
+
+
+def save_atomically(presentation: Presentation, path: str, reproducible: bool = False) -> None:
+    """
+    Save a deck so readers of `path` never see a partially written file.
+
+    With `reproducible`, zip timestamps are fixed so that identical decks are
+    byte-identical files.
+    """
+    tmp_path = f"{path}.tmp"
+    if reproducible:
+        buffer = BytesIO()
+        presentation.save(buffer)
+        with open(tmp_path, "wb") as f:
+            f.write(_normalized_zip(buffer.getvalue()))
+    else:
+        presentation.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class DeferredNotes:
+    def __init__(
+        self,
+        llm_generate: Callable[..., str],
+        prompt_config: PromptConfig,
+        titles: List[str],
+        presentation: Presentation,
+        path: str,
+        report: Optional[GenerationReport] = None,
+        report_path: Optional[str] = None,
+        on_done: Optional[Callable[["DeferredNotes"], None]] = None,
+        reproducible: bool = False,
+        cancel: Optional[CancelToken] = None,
+    ):
+        """
+        Second phase of a deck delivered without speaker notes.
+
+        Generates the notes of every slide in a background thread, writes them
+        into the slides' notes pages and saves the deck again in place. The
+        slides of `presentation` must be in the order of `titles`, and the
+        presentation must not be used by the caller while the job runs.
+
+        Args:
+            llm_generate (Callable[..., str]): Function to generate text using a language model.
+            prompt_config (PromptConfig): Configuration for prompts.
+            titles (List[str]): Slide titles, one per slide.
+            presentation (Presentation): The delivered deck.
+            path (str): Where the deck was saved; it is replaced when notes are ready.
+            report (Optional[GenerationReport]): Report updated with the notes status.
+            report_path (Optional[str]): Where the report is saved again.
+            on_done (Optional[Callable[[DeferredNotes], None]]): Called when the job
+                finished or failed.
+            reproducible (bool): Save with fixed zip timestamps, see save_atomically.
+            cancel (Optional[CancelToken]): Stops the job; the deck is left as delivered.
+        """
+        self.llm_generate = llm_generate
+        self.prompt_config = prompt_config
+        self.titles = titles
+        self.presentation = presentation
+        self.path = path
+        self.report = report
+        self.report_path = report_path
+        self.on_done = on_done
+        self.reproducible = reproducible
+        self.cancel = cancel
+
+        self.status = "pending"
+        self.error: Optional[Exception] = None
+        self._finished = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "DeferredNotes":
+        # not a daemon, a CLI run waits for the notes before exiting
+        self._thread = threading.Thread(target=self._run, name="speaker-notes")
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        self.status = "running"
+        start = time.time()
+        written = 0
+        try:
+            for slide, title in zip(self.presentation.slides, self.titles):
+                if self.cancel is not None:
+                    self.cancel.raise_if_cancelled()
+                try:
+                    notes = llm_generate_speaker_notes(self.llm_generate, title, self.prompt_config)
+                except CircuitOpenError:
+                    notes = None
+                if notes:
+                    slide.notes_slide.notes_text_frame.text = notes
+                    written += 1
+            save_atomically(self.presentation, self.path, reproducible=self.reproducible)
+            self.status = "done"
+        except Cancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            print(f"Speaker notes failed for {self.path}: {e}")
+            self.status = "failed"
+            self.error = e
+
+        if self.report is not None:
+            self.report.stats["notes"] = {
+                "mode": "deferred",
+                "status": self.status,
+                "slides": written,
+                "seconds": round(time.time() - start, 3),
+            }
+            if self.report_path is not None:
+                self.report.save(self.report_path)
+        self._finished.set()
+        if self.on_done is not None:
+            self.on_done(self)
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the notes are written.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        return self._finished.wait(timeout)
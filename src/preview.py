@@ -0,0 +1,183 @@
+import math
+from functools import lru_cache
+from io import BytesIO
+from typing import List, Union
+
+from PIL import Image, ImageDraw, ImageFont
+from pptx import Presentation
+from pptx.enum.dml import MSO_FILL
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.enum.text import MSO_ANCHOR, PP_ALIGN
+from pptx.util import Pt
+
+from .font import Font
+from .slides.text_metrics import load_glyph_table
+
+
+@lru_cache(maxsize=256)
+def _image_font(font_file: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_file, max(size, 1))
+
+
+def _wrap_words(text: str, font_file: str, size: float, width: float) -> List[str]:
+    """Greedy word wrap with the cached glyph advances."""
+    table = load_glyph_table(font_file)
+    space = table.text_width(" ") * size
+    lines, line, line_width = [], [], 0.0
+    for word in text.split():
+        word_width = table.text_width(word) * size
+        if line and line_width + space + word_width > width:
+            lines.append(" ".join(line))
+            line, line_width = [], 0.0
+        line_width += (space if line else 0.0) + word_width
+        line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def _draw_text_frame(draw: ImageDraw.ImageDraw, shape, font: Font, scale: float) -> None:
+    text_frame = shape.text_frame
+    text = text_frame.text
+    if not text.strip():
+        return
+    runs = [run for paragraph in text_frame.paragraphs for run in paragraph.runs]
+    size_emu = runs[0].font.size if runs and runs[0].font.size else Pt(18)
+    bold = bool(runs and runs[0].font.bold)
+    font_file = font.bold if bold else font.basic
+    size = size_emu * scale
+
+    left = (shape.left + text_frame.margin_left) * scale
+    top = (shape.top + text_frame.margin_top) * scale
+    width = (shape.width - text_frame.margin_left - text_frame.margin_right) * scale
+    height = (shape.height - text_frame.margin_top - text_frame.margin_bottom) * scale
+
+    image_font = _image_font(font_file, round(size))
+    ascent, descent = image_font.getmetrics()
+    line_height = ascent + descent
+    lines = _wrap_words(text, font_file, size, width)
+    block_height = line_height * len(lines)
+
+    if text_frame.vertical_anchor == MSO_ANCHOR.MIDDLE:
+        y = top + (height - block_height) / 2
+    elif text_frame.vertical_anchor == MSO_ANCHOR.BOTTOM:
+        y = top + height - block_height
+    else:
+        y = top
+    centered = text_frame.paragraphs[0].alignment == PP_ALIGN.CENTER
+    for line in lines:
+        x = left + (width - image_font.getlength(line)) / 2 if centered else left
+        draw.text((x, y), line, font=image_font, fill=(0, 0, 0))
+        y += line_height
+
+
+def render_slide_thumbnails(
+    presentation: Union[str, Presentation],
+    font: Font,
+    width: int = 480,
+) -> List[Image.Image]:
+    """
+    Render a PNG-ready thumbnail of every slide with PIL.
+
+    Pictures, textboxes and solid fills are drawn at the positions stored in
+    the deck, so the geometry is the same as the one produced by the slide
+    generators. Text is set with the font files of `font`.
+
+    Args:
+        presentation (Union[str, Presentation]): Deck or path to a .pptx file.
+        font (Font): Font the deck was generated with.
+        width (int): Thumbnail width in pixels.
+
+    Returns:
+        List[Image.Image]: One thumbnail per slide.
+    """
+    if isinstance(presentation, str):
+        presentation = Presentation(presentation)
+    scale = width / presentation.slide_width
+    height = round(presentation.slide_height * scale)
+
+    thumbnails = []
+    for slide in presentation.slides:
+        canvas = Image.new("RGB", (width, height), (255, 255, 255))
+        draw = ImageDraw.Draw(canvas, "RGBA")
+        for shape in slide.shapes:
+            box = (
+                round(shape.left * scale),
+                round(shape.top * scale),
+                round((shape.left + shape.width) * scale),
+                round((shape.top + shape.height) * scale),
+            )
+            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                picture = Image.open(BytesIO(shape.image.blob))
+                picture.draft("RGB", (box[2] - box[0], box[3] - box[1]))
+                picture = picture.convert("RGB").resize(
+                    (box[2] - box[0], box[3] - box[1]), Image.BILINEAR
+                )
+                canvas.paste(picture, box[:2])
+                continue
+            if shape.fill.type == MSO_FILL.SOLID:
+                rgb = tuple(shape.fill.fore_color.rgb)
+                draw.rectangle(box, fill=rgb + (128,))
+            if shape.has_text_frame:
+                _draw_text_frame(draw, shape, font, scale)
+        thumbnails.append(canvas)
+    return thumbnails
+
+
+def render_contact_sheet(
+    thumbnails: List[Image.Image],
+    columns: int = 4,
+    padding: int = 8,
+) -> Image.Image:
+    """
+    Arrange slide thumbnails in a grid on a grey background.
+
+    Args:
+        thumbnails (List[Image.Image]): Thumbnails of equal size.
+        columns (int): Number of thumbnails per row.
+        padding (int): Gap between thumbnails in pixels.
+
+    Returns:
+        Image.Image: The contact sheet.
+    """
+    if not thumbnails:
+        return Image.new("RGB", (1, 1), (200, 200, 200))
+    thumb_width, thumb_height = thumbnails[0].size
+    columns = min(columns, len(thumbnails))
+    rows = math.ceil(len(thumbnails) / columns)
+    sheet = Image.new(
+        "RGB",
+        (
+            columns * thumb_width + (columns + 1) * padding,
+            rows * thumb_height + (rows + 1) * padding,
+        ),
+        (200, 200, 200),
+    )
+    for index, thumbnail in enumerate(thumbnails):
+        row, column = divmod(index, columns)
+        sheet.paste(
+            thumbnail,
+            (
+                padding + column * (thumb_width + padding),
+                padding + row * (thumb_height + padding),
+            ),
+        )
+    return sheet
+
+
+def save_contact_sheet(
+    presentation_path: str,
+    font: Font,
+    output_path: str,
+    width: int = 480,
+    columns: int = 4,
+) -> str:
+    """
+    Render the contact sheet of a .pptx file and save it as PNG.
+
+    Returns:
+        str: Path of the saved image.
+    """
+    thumbnails = render_slide_thumbnails(presentation_path, font, width=width)
+    render_contact_sheet(thumbnails, columns=columns).save(output_path)
+    return output_path
@@ -0,0 +1,84 @@
+from typing import Dict, Optional
+
+from .notes import NOTES_MODES
+from .image_policy import QUALITY_PROFILES
+
+
+class Profile:
+    def __init__(
+        self,
+        name: str,
+        model_version: Optional[str] = None,
+        images: bool = True,
+        image_quality: str = "high",
+        notes_mode: str = "inline",
+        batch_text: bool = False,
+        picture_quality: Optional[int] = None,
+    ):
+        """
+        Named trade-off between speed and quality of a whole generation job.
+
+        Args:
+            name (str): Name the profile is selected by.
+            model_version (Optional[str]): Groq model of the text calls, None for
+                the model of the session.
+            images (bool): Generate slide images; without, slides get placeholders.
+            image_quality (str): "draft", "standard" or "high", see image_policy.
+            notes_mode (str): "inline", "deferred" or "skip", see generate_presentation.
+            batch_text (bool): Write the text of all slides in one LLM call
+                instead of one call per slide.
+            picture_quality (Optional[int]): JPEG quality of the pictures embedded
+                in the deck, None to embed lossless PNG.
+        """
+        if image_quality not in QUALITY_PROFILES:
+            raise ValueError(f"Unknown image quality {image_quality!r}.")
+        if notes_mode not in NOTES_MODES:
+            raise ValueError(f"Unknown notes mode {notes_mode!r}, expected one of {NOTES_MODES}.")
+        self.name = name
+        self.model_version = model_version
+        self.images = images
+        self.image_quality = image_quality
+        self.notes_mode = notes_mode
+        self.batch_text = batch_text
+        self.picture_quality = picture_quality
+
+    def __repr__(self) -> str:
+        return f"Profile({self.name!r})"
+
+
+# "draft" returns a deck in seconds for iterating on the content, "high"
+# reproduces the behavior from before profiles existed.
+PROFILES: Dict[str, Profile] = {
+    "draft": Profile(
+        "draft",
+        model_version="llama-3.1-8b-instant",
+        images=False,
+        image_quality="draft",
+        notes_mode="skip",
+        batch_text=True,
+        picture_quality=60,
+    ),
+    "standard": Profile(
+        "standard",
+        image_quality="standard",
+        notes_mode="deferred",
+        batch_text=True,
+        picture_quality=85,
+    ),
+    "high": Profile("high"),
+}
+
+DEFAULT_PROFILE = "high"
+
+
+def get_profile(name: Optional[str] = None) -> Profile:
+    """
+    Profile by name, the default one for None.
+
+    Raises:
+        ValueError: There is no profile of that name.
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile {name!r}, expected one of {sorted(PROFILES)}.")
+    return PROFILES[name]
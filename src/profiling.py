@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional, Set
+
+# tracemalloc is process-wide; it stays on while any profiler is running,
+# and is left alone if something else started it.
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+
+
+def _start_tracing() -> None:
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class NullProfiler:
+    """Profiler that does nothing, used when profiling is off."""
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def write(self, output_dir: str) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {}
+
+
+class StageProfiler:
+    def __init__(self, interval: float = 0.005):
+        """
+        Sampling CPU profiler with per-stage peak memory.
+
+        A background thread samples the Python stacks of the threads that
+        entered a stage every `interval` seconds and attributes them to the
+        current stage, so concurrent jobs do not show up in each other's
+        profiles. Work a job hands to other threads (backend calls, deferred
+        notes) is not sampled. Peak memory of every stage is measured with
+        tracemalloc, which is process-wide: with several jobs running at once
+        the peaks include their allocations too.
+
+        Args:
+            interval (float): Seconds between two stack samples.
+        """
+        self.interval = interval
+        self._stage: Optional[str] = None
+        self._samples: Counter = Counter()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_ids: Set[int] = set()
+        self._tracing = False
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            stage = self._stage
+            if stage is None:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in self._thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(stage)
+                self._samples[";".join(reversed(stack))] += 1
+
+    def _start(self) -> None:
+        _start_tracing()
+        self._tracing = True
+        self._thread = threading.Thread(target=self._sample_loop, name="stage-profiler", daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Attribute samples and memory of the block to the stage `name`.
+        """
+        if self._thread is None:
+            self._start()
+        self._thread_ids.add(threading.get_ident())
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        self._stage = name
+        try:
+            yield
+        finally:
+            self._stage = None
+            _, peak = tracemalloc.get_traced_memory()
+            self._stats[name] = {
+                "seconds": time.perf_counter() - start,
+                "peak_memory_mb": (peak - start_memory) / 2**20,
+            }
+
+    def stop(self) -> None:
+        """
+        Stop sampling and tracing; safe to call more than once.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._tracing:
+            _stop_tracing()
+            self._tracing = False
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Wall time, peak memory above the stage start and sample count per stage.
+        """
+        summary = {name: dict(stats, samples=0) for name, stats in self._stats.items()}
+        for stack, count in self._samples.items():
+            stage = stack.split(";", 1)[0]
+            if stage in summary:
+                summary[stage]["samples"] += count
+        return summary
+
+    def write(self, output_dir: str) -> None:
+        """
+        Stop profiling and write `profile.folded` (collapsed stacks, readable
+        by flamegraph.pl and speedscope) and `profile_summary.json`.
+        """
+        self.stop()
+        with open(os.path.join(output_dir, "profile.folded"), "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(output_dir, "profile_summary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
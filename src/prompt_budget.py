@@ -0,0 +1,86 @@
+import math
+import re
+from typing import List, Tuple
+
+# The CLIP text encoder of Stable Diffusion reads 77 tokens, two of which are
+# the start and end markers; everything after that is silently dropped.
+CLIP_MAX_TOKENS = 77
+IMAGE_PROMPT_TOKEN_BUDGET = CLIP_MAX_TOKENS - 2
+
+# Same pre-tokenization as the CLIP tokenizer: contractions, letter runs,
+# single digits and punctuation runs.
+_PRETOKENIZE = re.compile(r"'s|'t|'re|'ve|'m|'ll|'d|[^\W\d_]+|\d|[^\s\w]+")
+_LABEL = re.compile(r"^\s*(description|prompt|описание|ответ)\s*:\s*", re.IGNORECASE)
+_FILLER_WORDS = {"a", "an", "the", "very", "really", "quite", "various", "several"}
+
+
+def _word_tokens(word: str) -> int:
+    """Approximate BPE token count of one pre-tokenized word."""
+    if not word.isalpha():
+        return len(word)
+    if word.isascii():
+        # words up to 8 letters are mostly single entries of the CLIP vocabulary
+        return 1 if len(word) <= 8 else 1 + math.ceil((len(word) - 8) / 4)
+    # non-Latin scripts fall back to byte-level merges, about 2 letters per token
+    return math.ceil(len(word) / 2)
+
+
+def count_clip_tokens(text: str) -> int:
+    """
+    Approximate number of CLIP tokens in `text`, without the start and end markers.
+
+    Uses the CLIP pre-tokenization rules and a length heuristic instead of the
+    BPE vocabulary, so no tokenizer download is needed. Counts tend to be
+    slightly high, which keeps trimmed prompts within the real limit.
+    """
+    return sum(_word_tokens(word) for word in _PRETOKENIZE.findall(text.lower()))
+
+
+def _clauses(text: str) -> List[str]:
+    clauses, seen = [], set()
+    for clause in re.split(r"\s*[,;.]\s*", text):
+        key = clause.lower()
+        if clause and key not in seen:
+            seen.add(key)
+            clauses.append(clause)
+    return clauses
+
+
+def fit_prompt_to_budget(prompt: str, budget: int = IMAGE_PROMPT_TOKEN_BUDGET) -> Tuple[str, int]:
+    """
+    Deterministically shorten an image prompt to the text encoder budget.
+
+    Steps, each applied only while the prompt is still too long: strip the
+    answer label and extra whitespace, drop filler words and repeated
+    clauses, keep the leading clauses that fit, then cut at a word boundary.
+
+    Args:
+        prompt (str): Image prompt produced by the LLM.
+        budget (int): Maximum number of CLIP tokens.
+
+    Returns:
+        Tuple[str, int]: The fitted prompt and the number of tokens trimmed.
+    """
+    original_tokens = count_clip_tokens(prompt)
+    text = " ".join(_LABEL.sub("", prompt).split()).rstrip(" .")
+
+    if count_clip_tokens(text) > budget:
+        words = [word for word in text.split(" ") if word.lower() not in _FILLER_WORDS]
+        text = " ".join(words)
+
+    if count_clip_tokens(text) > budget:
+        clauses = _clauses(text)
+        kept = []
+        for clause in clauses:
+            if count_clip_tokens(", ".join(kept + [clause])) > budget:
+                break
+            kept.append(clause)
+        text = ", ".join(kept) if kept else clauses[0]
+
+    if count_clip_tokens(text) > budget:
+        words = text.split(" ")
+        while len(words) > 1 and count_clip_tokens(" ".join(words)) > budget:
+            words.pop()
+        text = " ".join(words)
+
+    return text, max(original_tokens - count_clip_tokens(text), 0)
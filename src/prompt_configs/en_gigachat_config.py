@@ -46,10 +46,23 @@ en_gigachat_config = PromptConfig(
         f'{prefix} This year, the company launched three new products that became market leaders.\n'
         'Response:\n'
     ),
+    texts_prompt = (
+        'You are given a presentation description: "{description}" and its slide titles:\n'
+        '{titles}\n'
+        'For every slide, write one sentence no more than 20 words. '
+        'Answer in English only. '
+        'Present the response as a numbered list in the order of the titles, one sentence per line, without the titles. '
+        'Examples:\n'
+        'Query: Presentation about company achievements over the past year.\n'
+        '1. This year, the company launched three new products that became market leaders.\n'
+        '2. The 20% sales increase is attributed to the implementation of the new marketing strategy.\n'
+        '3. New customer engagement approaches have increased satisfaction levels by 15%.\n'
+        'Response:\n'
+    ),
     image_prompt = (
         'You are given a presentation description: "{description}". '
         'Generate a detailed description of an aesthetic image for a slide with the title: "{title}". '
-        'The description should be long and highly detailed, covering all aspects of the visual elements. '
+        'The description should be a single dense sentence of at most 50 words, with the main subject first. '
         'Exclude numerical values, text, graphs, company names, and similar content. '
         'Avoid using text on the image. '
         'Answer in English only. '
@@ -1,18 +1,53 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
 prefix = "prompt: "
 
+# Generation parameters per call type, passed to `llm_generate` as keyword
+# arguments. Token budgets are sized for the expected answer, and stop
+# sequences end generation when the model starts another few-shot example.
+# They are anchored to a line start: the model often echoes the marker the
+# prompt ends with as its first line, which must not stop it. Text and image
+# prompt answers start with the `prefix` label; a second labelled line is an
+# echoed example and ends the answer.
+# Image prompts are capped near the 77-token window of the diffusion text
+# encoder, see prompt_budget.
+DEFAULT_GENERATION_PARAMS = {
+    "title": {"max_tokens": 160, "stop": ["\nQuery:", "\nЗапрос:"]},
+    "text": {"max_tokens": 80, "stop": ["\nResponse:", "\nОтвет:", "\n" + prefix.strip()]},
+    "texts": {"max_tokens": 600, "stop": ["\nQuery:", "\nЗапрос:"]},
+    "notes": {"max_tokens": 400},
+    "image": {"max_tokens": 100, "stop": ["\nResponse:", "\nОтвет:", "\n" + prefix.strip()]},
+    "background": {"max_tokens": 40, "stop": ["\nResponse:", "\nОтвет:", "\nInput:"]},
+}
+
 class PromptConfig:
     def __init__(
-        self, 
-        title_prompt: str, 
-        text_prompt: str, 
-        image_prompt: str, 
+        self,
+        title_prompt: str,
+        text_prompt: str,
+        image_prompt: str,
         background_prompt: str,
         background_styles: List[str],
+        generation_params: Optional[Dict[str, Dict[str, Any]]] = None,
+        texts_prompt: Optional[str] = None,
     ):
         self.title_prompt = title_prompt
         self.text_prompt = text_prompt
         self.image_prompt = image_prompt
         self.background_prompt = background_prompt
-        self.background_styles = background_styles
\ No newline at end of file
+        self.background_styles = background_styles
+        # text of all slides in one call, see llm_generate_slide_texts
+        self.texts_prompt = texts_prompt
+        # overrides are merged into the defaults per call type
+        self.generation_params = {
+            call_type: dict(params) for call_type, params in DEFAULT_GENERATION_PARAMS.items()
+        }
+        for call_type, params in (generation_params or {}).items():
+            self.generation_params.setdefault(call_type, {}).update(params)
+
+    def params_for(self, call_type: str) -> Dict[str, Any]:
+        """
+        Generation parameters (max_tokens, stop, temperature, top_p) for a call type:
+        "title", "text", "texts", "notes", "image" or "background".
+        """
+        return dict(self.generation_params.get(call_type, {}))
@@ -44,10 +44,22 @@ ru_gigachat_config = PromptConfig(
         f'{prefix} В этом году компания запустила три новых продукта, которые стали лидерами на рынке.\n'
         'Ответ:\n'
     ),
+    texts_prompt = (
+        'тебе дано описание презентации: "{description}" и заголовки ее слайдов:\n'
+        '{titles}\n'
+        'Для каждого слайда напиши одно предложение не более 20 слов. '
+        'Представь ответ в виде пронумерованного списка в порядке заголовков, по одному предложению в строке, без заголовков. '
+        'Примеры:\n'
+        'Запрос: Презентация о достижениях компании за прошлый год.\n'
+        '1. В этом году компания запустила три новых продукта, которые стали лидерами на рынке.\n'
+        '2. Увеличение продаж на 20% связано с внедрением новой маркетинговой стратегии.\n'
+        '3. Новые подходы к работе с клиентами увеличили уровень удовлетворенности на 15%.\n'
+        'Ответ:\n'
+    ),
     image_prompt = (
         'тебе дано описание презентации: "{description}". '
         'Придумай детализированное описание эстетичной картинки для слайда с заголовком: "{title}". '
-        'Описание должно быть длинным и супер детализированным, включающим все аспекты визуальной составляющей. '
+        'Описание должно быть одним насыщенным предложением не длиннее 40 слов, главное — в начале. '
         'Исключи цифровые значения, текст, графики, названия компаний и тому подобное. '
         'Избегай использования текста на изображении. '
         'Сделай его визуально приятным и подходящим контексту. '
@@ -71,6 +83,14 @@ ru_gigachat_config = PromptConfig(
         'ответственность, сообщество, проекты, партнерство\n'
         'Ответ:\n'
     ), 
+    # Cyrillic text takes roughly twice as many tokens
+    generation_params = {
+        'text': {'max_tokens': 160},
+        'texts': {'max_tokens': 1200},
+        'notes': {'max_tokens': 800},
+        'image': {'max_tokens': 200},
+        'background': {'max_tokens': 80},
+    },
     # List of strings!!!
     background_styles = [
         (
@@ -0,0 +1,40 @@
+import json
+from typing import Any, Dict, List
+
+
+class GenerationReport:
+    def __init__(self):
+        """
+        Summary of a generation job: which slides were degraded and why,
+        plus free-form statistics collected by the pipeline.
+        """
+        self.degraded: Dict[int, List[str]] = {}
+        self.stats: Dict[str, Any] = {}
+        # background speaker notes of a run with notes_mode="deferred"
+        self.notes_job = None
+
+    def degrade(self, slide_index: int, what: str) -> None:
+        """
+        Record that part of a slide was skipped or replaced by a fallback.
+
+        Args:
+            slide_index (int): Index of the slide, -1 for the whole deck.
+            what (str): What was degraded, e.g. "notes" or "image".
+        """
+        reasons = self.degraded.setdefault(slide_index, [])
+        if what not in reasons:
+            reasons.append(what)
+
+    @property
+    def degraded_slides(self) -> List[int]:
+        return sorted(index for index in self.degraded if index >= 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "degraded": {str(index): reasons for index, reasons in sorted(self.degraded.items())},
+            "stats": self.stats,
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
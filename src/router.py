@@ -0,0 +1,239 @@
+import os
+import re
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .metrics import metrics
+from .scheduler import PriorityScheduler, llm_scheduler
+from .circuit_breaker import CircuitBreaker, llm_breaker
+from .llm_utils import LLM_ERROR_RESPONSE
+from .cancellation import Cancelled
+
+# Routes of the process, e.g. "text=llama-3.3-70b-versatile:2,notes=llama-3.3-70b-versatile:2"
+LLM_ROUTES = os.getenv("LLM_ROUTES")
+
+# Call types answering with a numbered list; an answer without one is counted as off-format.
+_LIST_CALL_TYPES = ("title", "texts")
+_LIST_ITEM = re.compile(r"^\s*\d+[.)]", re.MULTILINE)
+
+
+class Route:
+    def __init__(
+        self,
+        name: str,
+        model_version: str,
+        max_concurrency: int = 2,
+        scheduler: Optional[PriorityScheduler] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        One text model with its own concurrency limit, circuit breaker and
+        statistics, so a failing model does not block the others.
+
+        Latency is measured around the model call only, so cache hits and
+        time spent waiting for a slot do not count. Quality is tracked with
+        cheap proxies per call type: error answers, empty answers, answers
+        off the requested format and the mean answer length.
+
+        Args:
+            name (str): Route name used in stats and metrics.
+            model_version (str): Groq model serving the route.
+            max_concurrency (int): Calls of the route in flight at once.
+            scheduler (Optional[PriorityScheduler]): Shared scheduler to use
+                instead of a new one with `max_concurrency` slots.
+            breaker (Optional[CircuitBreaker]): Shared breaker to use instead
+                of a new one for the route's model.
+        """
+        self.name = name
+        self.model_version = model_version
+        self.scheduler = scheduler or PriorityScheduler(f"llm:{name}", max_concurrency=max_concurrency)
+        self.breaker = breaker or CircuitBreaker(f"llm:{name}", failure_threshold=5, recovery_timeout=30.0)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, call_type: Optional[str], seconds: float, response: Optional[str]) -> None:
+        call_type = call_type or "other"
+        failed = response is None or response == LLM_ERROR_RESPONSE
+        empty = not failed and not response.strip()
+        off_format = (
+            not failed and not empty and call_type in _LIST_CALL_TYPES and not _LIST_ITEM.search(response)
+        )
+        with self._lock:
+            stats = self._stats.setdefault(
+                call_type,
+                {"calls": 0, "errors": 0, "empty": 0, "off_format": 0, "seconds": 0.0, "max_seconds": 0.0, "chars": 0},
+            )
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["empty"] += empty
+            stats["off_format"] += off_format
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["chars"] += 0 if failed else len(response)
+        metrics.observe("llm.route_seconds", seconds, route=self.name, call_type=call_type)
+        if failed:
+            metrics.increment("llm.route_errors", route=self.name, call_type=call_type)
+
+    def measure(self, llm_generate: Callable[..., str], call_type: Optional[str]) -> Callable[..., str]:
+        """
+        Wrap the model call of the route so that every call is recorded,
+        except calls abandoned by a cancelled job, which say nothing about
+        the model.
+        """
+        def measured(prompt: str, **params: Any) -> str:
+            start = time.time()
+            try:
+                response = llm_generate(prompt, **params)
+            except Cancelled:
+                raise
+            except BaseException:
+                self.record(call_type, time.time() - start, None)
+                raise
+            self.record(call_type, time.time() - start, response)
+            return response
+
+        return measured
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Per call type: calls, error, empty and off-format rates, mean and
+        max latency in seconds and mean answer length in characters.
+        """
+        with self._lock:
+            by_call_type = {}
+            for call_type, stats in self._stats.items():
+                calls = stats["calls"]
+                answered = calls - stats["errors"]
+                by_call_type[call_type] = {
+                    "calls": calls,
+                    "error_rate": stats["errors"] / calls,
+                    "empty_rate": stats["empty"] / calls,
+                    "off_format_rate": stats["off_format"] / calls,
+                    "mean_seconds": stats["seconds"] / calls,
+                    "max_seconds": stats["max_seconds"],
+                    "mean_chars": stats["chars"] / answered if answered else 0.0,
+                }
+        return {
+            "model": self.model_version,
+            "max_concurrency": self.scheduler.max_concurrency,
+            "circuit": self.breaker.stats(),
+            "call_types": by_call_type,
+        }
+
+
+class ModelRouter:
+    def __init__(self, routes: List[Route], call_routes: Dict[str, str], default: str):
+        """
+        Maps the call types of llm_utils ("title", "text", "texts", "notes",
+        "image", "background") to routes; other calls take the default route.
+
+        Args:
+            routes (List[Route]): Available routes.
+            call_routes (Dict[str, str]): Route name per call type.
+            default (str): Name of the route of unmapped call types.
+        """
+        self.routes = {route.name: route for route in routes}
+        for route_name in list(call_routes.values()) + [default]:
+            if route_name not in self.routes:
+                raise ValueError(f"Unknown route {route_name!r}.")
+        self.call_routes = dict(call_routes)
+        self.default = default
+        self._lock = threading.Lock()
+        self._pinned: Dict[str, "ModelRouter"] = {}
+
+    @classmethod
+    def single(cls, model_version: str) -> "ModelRouter":
+        """
+        Every call on one model, sharing the process-wide LLM scheduler and breaker.
+        """
+        return cls([Route("default", model_version, scheduler=llm_scheduler, breaker=llm_breaker)], {}, "default")
+
+    @classmethod
+    def from_spec(cls, spec: Optional[str], default_model: str) -> "ModelRouter":
+        """
+        Router from a spec like "text=llama-3.3-70b-versatile:2,notes=llama-3.3-70b-versatile".
+
+        Each entry sends a call type to a model, optionally with the number
+        of concurrent calls of that model (2 by default). Entries naming the
+        same model share its route; unlisted call types use `default_model`
+        on the process-wide LLM scheduler.
+
+        Raises:
+            ValueError: The spec is malformed.
+        """
+        router = cls.single(default_model)
+        routes, call_routes = dict(router.routes), {}
+        for entry in filter(None, (part.strip() for part in (spec or "").split(","))):
+            match = re.fullmatch(r"(\w+)=([\w.\-/]+)(?::(\d+))?", entry)
+            if match is None:
+                raise ValueError(f"Malformed route {entry!r}, expected call_type=model[:concurrency].")
+            call_type, model_version, concurrency = match.groups()
+            if model_version == default_model:
+                call_routes[call_type] = "default"
+                continue
+            if model_version not in routes:
+                routes[model_version] = Route(model_version, model_version, max_concurrency=int(concurrency or 2))
+            call_routes[call_type] = model_version
+        return cls(list(routes.values()), call_routes, "default")
+
+    def route_for(self, call_type: Optional[str]) -> Route:
+        return self.routes[self.call_routes.get(call_type, self.default)]
+
+    def pinned(self, model_version: str) -> "ModelRouter":
+        """
+        Router sending every call to one model, e.g. the model of a profile.
+        It reuses a route of that model, or the default route's slots with
+        a breaker of its own.
+        """
+        with self._lock:
+            if model_version not in self._pinned:
+                route = next((r for r in self.routes.values() if r.model_version == model_version), None)
+                if route is None:
+                    route = Route(model_version, model_version, scheduler=self.routes[self.default].scheduler)
+                self._pinned[model_version] = ModelRouter([route], {}, route.name)
+            return self._pinned[model_version]
+
+    def wrap(self, make_chain: Callable[[Route, Optional[str]], Callable[..., str]]) -> Callable[..., str]:
+        """
+        Text generation function dispatching each call by its `call_type`.
+
+        Args:
+            make_chain (Callable[[Route, Optional[str]], Callable[..., str]]):
+                Builds the generation function of a route for a call type,
+                called once per call type.
+
+        Returns:
+            Callable[..., str]: Function with the signature of `LLMClient.generate`.
+        """
+        chains: Dict[Optional[str], Callable[..., str]] = {}
+        lock = threading.Lock()
+
+        def routed_generate(prompt: str, call_type: Optional[str] = None, **params: Any) -> str:
+            with lock:
+                if call_type not in chains:
+                    chains[call_type] = make_chain(self.route_for(call_type), call_type)
+                chain = chains[call_type]
+            return chain(prompt, **params)
+
+        return routed_generate
+
+    def _all_routes(self) -> Dict[str, Route]:
+        routes = dict(self.routes)
+        with self._lock:
+            for router in self._pinned.values():
+                routes.setdefault(router.default, router.routes[router.default])
+        return routes
+
+    def breakers(self) -> Dict[str, CircuitBreaker]:
+        """
+        Circuit breakers of all routes, pinned ones included, by name.
+        """
+        return {route.breaker.name: route.breaker for route in self._all_routes().values()}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "call_routes": dict(self.call_routes),
+            "default": self.default,
+            "routes": {name: route.stats() for name, route in self._all_routes().items()},
+        }
@@ -0,0 +1,148 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import metrics
+from .cancellation import CancelToken, Cancelled
+
+# Share of backend slots each priority class gets while all classes are busy.
+DEFAULT_WEIGHTS = {
+    "interactive": 8.0,
+    "batch": 1.0,
+}
+
+
+class PriorityScheduler:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 2,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Weighted fair queue in front of a rate-limited backend.
+
+        Every call takes one of `max_concurrency` slots. Waiting calls are
+        tagged with a virtual finish time that advances by 1 / weight of
+        their class, and the smallest tag is served first. A newly queued
+        interactive call therefore jumps ahead of queued batch calls, while
+        batch calls still get their share of the slots. Running calls are
+        never interrupted, so preemption happens at call boundaries.
+
+        Args:
+            name (str): Backend name used in metrics.
+            max_concurrency (int): Number of calls allowed in flight.
+            weights (Optional[Dict[str, float]]): Weight of each priority class.
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._virtual_time = 0.0
+        self._last_finish = {priority: 0.0 for priority in self.weights}
+        self._waiting = {priority: 0 for priority in self.weights}
+        self._wait_total = {priority: 0.0 for priority in self.weights}
+        self._served = {priority: 0 for priority in self.weights}
+
+    def _notify(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def _acquire(self, priority: str, cancel: Optional[CancelToken] = None) -> None:
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority class '{priority}'.")
+        enqueued = time.monotonic()
+        with self._cond:
+            tag = max(self._virtual_time, self._last_finish[priority]) + 1.0 / self.weights[priority]
+            self._last_finish[priority] = tag
+            ticket = (tag, next(self._sequence))
+            heapq.heappush(self._queue, ticket)
+            self._waiting[priority] += 1
+            metrics.set_gauge("scheduler.queue_depth", self._waiting[priority], backend=self.name, priority=priority)
+            unregister = cancel.on_cancel(self._notify) if cancel is not None else (lambda: None)
+            try:
+                while self._active >= self.max_concurrency or self._queue[0] != ticket:
+                    if cancel is not None and cancel.cancelled:
+                        # drop the call from the queue, the job no longer needs it
+                        self._queue.remove(ticket)
+                        heapq.heapify(self._queue)
+                        self._waiting[priority] -= 1
+                        metrics.increment("scheduler.dropped", backend=self.name, priority=priority)
+                        self._cond.notify_all()
+                        raise Cancelled(cancel.reason)
+                    self._cond.wait()
+            finally:
+                unregister()
+            heapq.heappop(self._queue)
+            self._active += 1
+            self._virtual_time = tag
+            self._waiting[priority] -= 1
+
+            waited = time.monotonic() - enqueued
+            self._wait_total[priority] += waited
+            self._served[priority] += 1
+            metrics.set_gauge("scheduler.queue_depth", self._waiting[priority], backend=self.name, priority=priority)
+            # wake up the next ticket in case a slot is still free
+            self._cond.notify_all()
+        metrics.observe("scheduler.wait_seconds", waited, backend=self.name, priority=priority)
+
+    def _release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: str = "interactive", cancel: Optional[CancelToken] = None):
+        """
+        Hold one backend slot for the duration of the block.
+
+        Raises:
+            Cancelled: `cancel` was cancelled while waiting for the slot.
+        """
+        self._acquire(priority, cancel)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def wrap(
+        self,
+        fn: Callable[..., Any],
+        priority: str = "interactive",
+        cancel: Optional[CancelToken] = None,
+    ) -> Callable[..., Any]:
+        """
+        Wrap a backend call so that it is scheduled with the given priority,
+        and dropped from the queue if `cancel` is cancelled first.
+        """
+        def scheduled(*args, **kwargs):
+            with self.slot(priority, cancel):
+                return fn(*args, **kwargs)
+
+        return scheduled
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Queue depth and wait times per priority class.
+        """
+        with self._cond:
+            return {
+                priority: {
+                    "queue_depth": self._waiting[priority],
+                    "served": self._served[priority],
+                    "mean_wait": self._wait_total[priority] / self._served[priority] if self._served[priority] else 0.0,
+                }
+                for priority in self.weights
+            }
+
+
+# Process-wide schedulers shared by every job, one per backend quota.
+llm_scheduler = PriorityScheduler("llm", max_concurrency=4)
+image_scheduler = PriorityScheduler("image", max_concurrency=2)
@@ -0,0 +1,414 @@
+import os
+import copy
+import shutil
+import functools
+import random
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .constructor import generate_presentation, new_presentation
+from .prompt_configs import PromptConfig, en_gigachat_config, ru_gigachat_config
+from .generate_text_LLM import LLMClient
+from .generate_image import ImageClient, api_sd_generate
+from .font import Font
+from .image_cache import PromptImageCache
+from .llm_cache import LLMCache
+from .scheduler import llm_scheduler, image_scheduler
+from .singleflight import llm_flights, image_flights
+from .circuit_breaker import image_breaker
+from .llm_utils import LLM_ERROR_RESPONSE
+from .slides.text_metrics import load_glyph_table
+from .preview import save_contact_sheet
+from .metrics import metrics
+from .report import GenerationReport
+from .admission import AdmissionController, Ticket
+from .artifacts import ArtifactStore
+from .profiles import get_profile
+from .router import LLM_ROUTES, ModelRouter, Route
+from .cancellation import CancelToken, Cancelled
+
+PROMPT_CONFIGS = {
+    "English": en_gigachat_config,
+    "Russian": ru_gigachat_config,
+}
+
+
+def _remove_partial_output(output_dir: str) -> None:
+    """Delete the files generate_presentation writes into a folder."""
+    for name in ("draft.pptx", "presentation.pptx", "presentation.pptx.tmp", "report.json"):
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(os.path.join(output_dir, "pictures"), ignore_errors=True)
+
+
+class PresentationGenerator:
+    def __init__(
+        self,
+        fonts_dir: str = "./fonts",
+        logs_dir: str = "./logs",
+        cache_dir: str = "./cache",
+        model_version: str = "llama-3.1-8b-instant",
+        image_client: Optional[ImageClient] = None,
+        image_cache_threshold: float = 0.85,
+        template: Optional[str] = None,
+        max_workers: int = 4,
+        admission: Optional[AdmissionController] = None,
+        artifacts: Optional[ArtifactStore] = None,
+        router: Optional[ModelRouter] = None,
+    ):
+        """
+        Long-lived generation session for servers and batch jobs.
+
+        Owns the warm LLM and image clients, the font registry with its glyph
+        tables, the presentation template and a worker pool, so that none of
+        them are rebuilt per deck.
+
+        Args:
+            fonts_dir (str): Directory containing the font files.
+            logs_dir (str): Root of the artifact store receiving one folder per deck.
+            cache_dir (str): Directory of the image and LLM caches.
+            model_version (str): Groq model used for text generation.
+            image_client (Optional[ImageClient]): Image backend, defaults to the
+                process-wide Hugging Face client.
+            image_cache_threshold (float): Minimum prompt similarity to reuse a cached image.
+            template (Optional[str]): .pptx template the decks are built on.
+            max_workers (int): Number of decks generated concurrently by `submit`.
+            admission (Optional[AdmissionController]): Per-tenant quotas and the bounded
+                job queue, defaults to one running `max_workers` jobs at a time.
+            artifacts (Optional[ArtifactStore]): Store of the decks and their images,
+                defaults to one in logs_dir with the default retention.
+            router (Optional[ModelRouter]): Model and concurrency limit per LLM call
+                type, defaults to the LLM_ROUTES environment variable and otherwise
+                `model_version` for every call.
+        """
+        self.logs_dir = logs_dir
+        self.artifacts = artifacts or ArtifactStore(logs_dir)
+        self.artifacts.maybe_gc()
+        self.template = template
+
+        self.font = Font(fonts_dir)
+        for font_name in self.font._find_available_fonts():
+            self.font.set_font(font_name)
+            for font_file in (self.font.basic, self.font.bold):
+                load_glyph_table(font_file)
+        new_presentation(template)
+
+        self.llm_client = LLMClient(model_version=model_version)
+        self._llm_clients = {model_version: self.llm_client}
+        self.router = router or ModelRouter.from_spec(LLM_ROUTES, model_version)
+        self.image_client = image_client or api_sd_generate
+        self.image_cache = PromptImageCache(
+            os.path.join(cache_dir, "images"),
+            threshold=image_cache_threshold,
+        )
+        self.llm_cache = LLMCache(os.path.join(cache_dir, "llm.db"))
+
+        self.admission = admission or AdmissionController(max_running=max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="presentation")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._active_jobs = 0
+        self._notes_jobs = []
+        self._closed = False
+        self.started_at = time.time()
+
+    def _llm_client_for(self, model_version: Optional[str]) -> LLMClient:
+        """
+        Client of a text model, created on first use; the session's own for None.
+        """
+        if model_version is None:
+            return self.llm_client
+        with self._lock:
+            if model_version not in self._llm_clients:
+                self._llm_clients[model_version] = LLMClient(model_version=model_version)
+            return self._llm_clients[model_version]
+
+    def backends(
+        self,
+        priority: str,
+        budget=None,
+        model_version: Optional[str] = None,
+        cancel: Optional[CancelToken] = None,
+    ):
+        """
+        LLM and image callables with scheduling, circuit breakers, coalescing
+        and caching applied. LLM calls are dispatched by their `call_type`
+        to the model and slots of their route, see router. When the image
+        client has a batch endpoint, the image callable carries a
+        `generate_images` attribute for whole decks; without one, images are
+        requested per slide so each can fail, time out and be cached alone.
+
+        Args:
+            priority (str): Scheduling class of the calls, "interactive" or "batch".
+            budget (Optional[SpendBudget]): Charged for every call missing the
+                caches; see warmer.
+            model_version (Optional[str]): Groq model of all text calls, bypassing
+                the routes; the session's routes for None.
+            cancel (Optional[CancelToken]): Once cancelled, queued calls are dropped
+                and in-flight requests aborted with Cancelled.
+        """
+        router = self.router if model_version is None else self.router.pinned(model_version)
+
+        def route_chain(route: Route, call_type: Optional[str]) -> Callable[..., str]:
+            llm_client = self._llm_client_for(route.model_version)
+            client_generate = llm_client.generate
+            if cancel is not None:
+                client_generate = functools.partial(client_generate, cancel=cancel)
+            # an open circuit fails before the call is queued for a backend slot
+            llm_generate = llm_flights.wrap(
+                route.breaker.wrap(
+                    route.scheduler.wrap(route.measure(client_generate, call_type), priority, cancel),
+                    is_failure=lambda text: text == LLM_ERROR_RESPONSE,
+                ),
+                namespace=llm_client.model_version,
+                cancel=cancel,
+            )
+            if budget is not None:
+                llm_generate = budget.wrap_llm(llm_generate)
+            return self.llm_cache.wrap(llm_generate, namespace=llm_client.model_version)
+
+        client_generate_image = self.image_client
+        generate_images = None
+        if getattr(self.image_client, "batch_url", None):
+            generate_images = self.image_client.generate_images
+        if cancel is not None:
+            client_generate_image = functools.partial(client_generate_image, cancel=cancel)
+            if generate_images is not None:
+                generate_images = functools.partial(generate_images, cancel=cancel)
+        generate_image = image_flights.wrap(
+            image_breaker.wrap(image_scheduler.wrap(client_generate_image, priority, cancel)),
+            namespace=self.image_client.api_url,
+            cancel=cancel,
+        )
+        # a batch takes one backend slot and counts as one call for the breaker
+        if generate_images is not None:
+            generate_images = image_breaker.wrap(image_scheduler.wrap(generate_images, priority, cancel))
+        if budget is not None:
+            # charged on cache misses only, and refused without tripping the breakers
+            generate_image = budget.wrap_image(generate_image)
+            if generate_images is not None:
+                generate_images = budget.wrap_images(generate_images)
+        cached_generate_image = self.image_cache.wrap(generate_image)
+        if generate_images is not None:
+            # picked up by generate_presentation to request a deck's images at once
+            cached_generate_image.generate_images = self.image_cache.wrap_batch(generate_images)
+        return router.wrap(route_chain), cached_generate_image
+
+    def generate(
+        self,
+        description: str,
+        tenant: str = "default",
+        ticket: Optional[Ticket] = None,
+        language: str = "English",
+        prompt_config: Optional[PromptConfig] = None,
+        time_limit: Optional[float] = None,
+        priority: str = "interactive",
+        profile: bool = False,
+        preview: bool = False,
+        on_progress: Optional[Callable[[str, dict], None]] = None,
+        draft: bool = False,
+        output_dir: Optional[str] = None,
+        job_id: Optional[str] = None,
+        image_quality: Optional[str] = None,
+        notes_mode: Optional[str] = None,
+        seed: Optional[int] = None,
+        performance_profile: Optional[str] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> str:
+        """
+        Generate a presentation based on the given description.
+
+        Args:
+            description (str): Description of the presentation to generate
+            tenant (str): Client the job is accounted to by admission control
+            ticket (Optional[Ticket]): Admission already granted, as done by `submit`
+            language (str): "English" or "Russian", selects the prompt config
+            prompt_config (Optional[PromptConfig]): Overrides the language config
+            time_limit (Optional[float]): Seconds until the deck must be ready; slides
+                are degraded as the limit approaches
+            priority (str): Scheduling class of the backend calls, "interactive" or "batch"
+            profile (bool): Write a CPU profile and per-stage memory peaks next to the deck
+            preview (bool): Render a PNG contact sheet of the slides next to the deck
+            on_progress (Optional[Callable[[str, dict], None]]): Receives progress events
+                and partial results, see generate_presentation
+            draft (bool): Save a text-only draft deck before the images are generated
+            output_dir (Optional[str]): Folder of the deck, bypassing the artifact store
+            job_id (Optional[str]): ID of the job in the artifact store, a new UUID by default
+            image_quality (Optional[str]): "draft", "standard" or "high" image resolution
+                and steps, overriding the profile
+            notes_mode (Optional[str]): "inline", "deferred" (added to the returned file in
+                the background, followed by a "notes" progress event) or "skip",
+                overriding the profile
+            seed (Optional[int]): Makes the font, layouts and backend seeds reproducible;
+                the same seed gives byte-identical decks
+            performance_profile (Optional[str]): "draft", "standard" or "high" (the
+                default), see profiles
+            cancel (Optional[CancelToken]): Cancelling it stops the job, waiting or
+                running, aborts its backend calls and removes its partial output
+
+        Returns:
+            str: Path to the generated PowerPoint file
+
+        Raises:
+            RejectedError: The tenant is over its quota or the service is overloaded.
+            Cancelled: `cancel` was cancelled before the deck was saved.
+        """
+        settings = get_profile(performance_profile)
+        if ticket is None:
+            if self._closed:
+                raise RuntimeError("PresentationGenerator is closed.")
+            ticket = self.admission.admit(tenant)
+        ticket.cancel = cancel
+        with ticket:
+            font = copy.copy(self.font)
+            font.set_random_font(None if seed is None else random.Random(seed))
+            save_picture = None
+            if output_dir is None:
+                job_id = self.artifacts.new_job(job_id, description=description, language=language)
+                output_dir = self.artifacts.job_dir(job_id)
+                save_picture = lambda picture: self.artifacts.put_image(
+                    picture, job_id, quality=settings.picture_quality,
+                )
+            llm_generate, generate_image = self.backends(
+                priority, model_version=settings.model_version, cancel=cancel,
+            )
+            report = GenerationReport()
+            report.stats['performance_profile'] = settings.name
+
+            with self._lock:
+                self._active_jobs += 1
+            try:
+                generate_presentation(
+                    llm_generate=llm_generate,
+                    generate_image=generate_image,
+                    prompt_config=prompt_config or PROMPT_CONFIGS[language],
+                    description=description,
+                    font=font,
+                    output_dir=output_dir,
+                    deadline=None if time_limit is None else time.time() + time_limit,
+                    profile=profile,
+                    on_progress=on_progress,
+                    draft=draft,
+                    template=self.template,
+                    image_quality=image_quality or settings.image_quality,
+                    notes_mode=notes_mode or settings.notes_mode,
+                    report=report,
+                    save_picture=save_picture,
+                    seed=seed,
+                    images=settings.images,
+                    batch_text=settings.batch_text,
+                    picture_quality=settings.picture_quality,
+                    cancel=cancel,
+                )
+            except Cancelled:
+                print(f"Generation cancelled: {cancel.reason}")
+                metrics.increment("jobs.cancelled")
+                if save_picture is not None:
+                    self.artifacts.discard_job(job_id)
+                else:
+                    _remove_partial_output(output_dir)
+                raise
+            except BaseException:
+                if save_picture is not None:
+                    self.artifacts.finish_job(job_id, status="failed")
+                raise
+            finally:
+                with self._lock:
+                    self._active_jobs -= 1
+                    self._idle.notify_all()
+                    if report.notes_job is not None:
+                        self._notes_jobs = [job for job in self._notes_jobs if not job.done]
+                        self._notes_jobs.append(report.notes_job)
+
+            presentation_path = f'{output_dir}/presentation.pptx'
+            if preview:
+                save_contact_sheet(presentation_path, font, f'{output_dir}/preview.png')
+            if save_picture is not None:
+                self.artifacts.finish_job(job_id, path=presentation_path)
+                self.artifacts.maybe_gc()
+            return presentation_path
+
+    def submit(self, description: str, tenant: str = "default", **options) -> Future:
+        """
+        Generate a presentation on the session's worker pool.
+
+        Admission is checked before queueing, so an overloaded service
+        rejects the job here instead of in the returned future.
+
+        Returns:
+            Future: Resolves to the path of the generated PowerPoint file.
+
+        Raises:
+            RejectedError: The tenant is over its quota or the service is overloaded.
+        """
+        if self._closed:
+            raise RuntimeError("PresentationGenerator is closed.")
+        ticket = self.admission.admit(tenant)
+        return self._executor.submit(self.generate, description, tenant=tenant, ticket=ticket, **options)
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Cheap readiness check that does not call the backends.
+        """
+        return {
+            "ok": not self._closed and self.llm_client.client.api_key is not None,
+            "closed": self._closed,
+            "uptime_seconds": time.time() - self.started_at,
+            "active_jobs": self._active_jobs,
+            "pending_notes": sum(not job.done for job in self._notes_jobs),
+            "fonts": len(self.font._find_available_fonts()),
+            "model": self.llm_client.model_version,
+            "image_backend": self.image_client.api_url,
+            "llm_queue": llm_scheduler.stats(),
+            "llm_routes": self.router.stats(),
+            "image_queue": image_scheduler.stats(),
+            "admission": self.admission.stats(),
+            "circuits": dict(
+                {name: breaker.stats() for name, breaker in self.router.breakers().items()},
+                image=image_breaker.stats(),
+            ),
+            "caches": {
+                "llm": {"hits": self.llm_cache.hits, "misses": self.llm_cache.misses},
+                "image": {"hits": self.image_cache.hits, "misses": self.image_cache.misses},
+            },
+            "metrics": metrics.snapshot(),
+        }
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop accepting jobs, let running ones and their deferred notes finish
+        and release the clients.
+
+        With `wait=False` it returns at once and the clients are released in
+        the background, as running jobs and notes still need them.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=False)
+        if wait:
+            self._release_clients()
+        else:
+            threading.Thread(target=self._release_clients, name="session-close", daemon=True).start()
+
+    def _release_clients(self) -> None:
+        self._executor.shutdown(wait=True)
+        # jobs run by `generate` outside the pool register their notes when they end
+        with self._idle:
+            self._idle.wait_for(lambda: self._active_jobs == 0)
+        for job in self._notes_jobs:
+            job.wait()
+        for llm_client in self._llm_clients.values():
+            llm_client.close()
+        if self.image_client is not api_sd_generate:
+            self.image_client.close()
+
+    def __enter__(self) -> "PresentationGenerator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,134 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from .metrics import metrics
+from .cancellation import CancelToken, Cancelled
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn lists and dicts in call arguments into hashable tuples."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # wake-up events of followers watching their own cancel token
+        self.waiters: List[threading.Event] = []
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        """
+        Coalesce concurrent identical calls into one in-flight request.
+
+        The first caller for a key runs the function, callers arriving with
+        the same key while it is running wait for it and share its result
+        or exception. Nothing is cached once the call has finished. When the
+        leader was cancelled, waiting callers run the call again themselves,
+        as their own jobs may still need it; a waiting caller whose own job
+        is cancelled stops waiting at once.
+
+        Args:
+            name (str): Name used in metrics.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` unless a call with the same key is in flight.
+        """
+        return self._do(key, fn, args, kwargs, None)
+
+    def _wait(self, call: _Call, cancel: CancelToken) -> None:
+        wake = threading.Event()
+        with self._lock:
+            if call.done.is_set():
+                return
+            call.waiters.append(wake)
+        unregister = cancel.on_cancel(wake.set)
+        try:
+            wake.wait()
+        finally:
+            unregister()
+        if not call.done.is_set():
+            metrics.increment("singleflight.cancelled", name=self.name)
+            raise Cancelled(cancel.reason)
+
+    def _do(
+        self,
+        key: Hashable,
+        fn: Callable[..., Any],
+        args: tuple,
+        kwargs: dict,
+        cancel: Optional[CancelToken],
+    ) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.increment("singleflight.coalesced", name=self.name)
+            if cancel is None:
+                call.done.wait()
+            else:
+                self._wait(call, cancel)
+        else:
+            metrics.increment("singleflight.calls", name=self.name)
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                    call.done.set()
+                    waiters = list(call.waiters)
+                for wake in waiters:
+                    wake.set()
+
+        if not leader and isinstance(call.error, Cancelled):
+            return self._do(key, fn, args, kwargs, cancel)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def wrap(
+        self,
+        fn: Callable[..., Any],
+        namespace: Hashable = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Callable[..., Any]:
+        """
+        Wrap a function so that concurrent calls with identical arguments
+        share one request.
+
+        Args:
+            fn (Callable[..., Any]): Function whose arguments are hashable
+                or lists and dicts of hashable values.
+            namespace (Hashable): Extra key part, e.g. the model name, for
+                wrapped functions that differ only in their configuration.
+            cancel (Optional[CancelToken]): Token of the calling job; once
+                cancelled, its calls stop waiting for another job's request
+                and raise Cancelled.
+        """
+        def coalesced(*args, **kwargs):
+            key = (namespace, _freeze(args), _freeze(kwargs))
+            return self._do(key, fn, args, kwargs, cancel)
+
+        return coalesced
+
+
+# Process-wide coalescing groups, one per backend.
+llm_flights = SingleFlight("llm")
+image_flights = SingleFlight("image")
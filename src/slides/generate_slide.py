@@ -26,25 +26,40 @@ def generate_slide(
     picture_path: Optional[str] = None,
     font: Font = None, 
     text_font_coeff: float = 0.6,
+    rng: Optional[random.Random] = None,
 ) -> None:
     """
     Generate a slide in the presentation based on the provided content.
     
     Args:
         text (Optional[Tuple[str, str]]): Tuple of (slide_text, speaker_notes)
+        picture_path (Optional[str]): Picture for the image layout; without it
+            the slide uses the plain text layout.
+        rng (Optional[random.Random]): Source of randomness for the layout choice.
     """
     slide_text = None if text is None else text[0]
     speaker_notes = None if text is None else text[1]
     
-    # All slides will use image_slide layout
-    slide = generate_image_slide(
-        presentation=presentation,
-        title=title,
-        text=slide_text,
-        picture_path=picture_path,
-        font=font,
-        text_font_coeff=text_font_coeff,
-    )
+    if picture_path is not None:
+        slide = generate_image_slide(
+            presentation=presentation,
+            title=title,
+            text=slide_text,
+            picture_path=picture_path,
+            font=font,
+            text_font_coeff=text_font_coeff,
+            rng=rng,
+        )
+    else:
+        # Slides without a picture fall back to the text-only layout
+        slide = generate_plain_text_slide(
+            presentation=presentation,
+            title=title,
+            text=slide_text or '',
+            background_path=background_path,
+            font=font,
+            text_font_coeff=text_font_coeff,
+        )
 
     # Add speaker notes if they exist
     if speaker_notes and slide is not None:
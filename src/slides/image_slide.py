@@ -12,7 +12,7 @@ import tqdm
 import os
 
 from src.font import Font
-from .slide_utils import add_paragraph
+from .slide_utils import add_paragraph, fit_text_to_box
 
 def generate_text_title_image_right(
     presentation: Presentation,
@@ -87,16 +87,14 @@ def generate_text_title_image_right(
     title_paragraph.alignment = PP_ALIGN.CENTER
     title_paragraph.text = title
 
-    for max_size in range(font.max_size)[::-5]: 
-        try: 
-            title_frame.fit_text(
-                font_file=font.bold, 
-                max_size=max_size,
-                bold=True,
-            )
-            break
-        except: 
-            pass
+    fit_text_to_box(
+        title_frame,
+        width=Inches(title_width),
+        height=Inches(title_height),
+        font_file=font.bold,
+        max_size=font.max_size,
+        bold=True,
+    )
 
     # text params
     title_left = margin
@@ -122,12 +120,13 @@ def generate_text_title_image_right(
     text_paragraph.text = text 
     text_paragraph.alignment = PP_ALIGN.CENTER
 
-    for max_size in range(int(max_size*text_font_coeff))[::-5]:
-        try: 
-            text_frame.fit_text(font_file=font.basic, max_size=max_size)
-            break
-        except: 
-            pass
+    fit_text_to_box(
+        text_frame,
+        width=Inches(text_width),
+        height=Inches(text_height),
+        font_file=font.basic,
+        max_size=int(font.max_size * text_font_coeff),
+    )
             
     
     return slide
@@ -207,16 +206,14 @@ def generate_text_title_image_left(
     title_paragraph.text = title
     title_paragraph.alignment = PP_ALIGN.CENTER
 
-    for max_size in range(font.max_size)[::-5]: 
-        try: 
-            title_frame.fit_text(
-                font_file=font.bold, 
-                max_size=max_size,
-                bold=True,
-            )
-            break
-        except: 
-            pass
+    fit_text_to_box(
+        title_frame,
+        width=Inches(title_width),
+        height=Inches(title_height),
+        font_file=font.bold,
+        max_size=font.max_size,
+        bold=True,
+    )
             
     # text params
     text_left = title_left
@@ -240,15 +237,13 @@ def generate_text_title_image_left(
     text_paragraph.text = text
     text_paragraph.alignment = PP_ALIGN.CENTER
     
-    for max_size in range(int(max_size*text_font_coeff))[::-5]:
-        try: 
-            text_frame.fit_text(
-                font_file=font.basic, 
-                max_size=max_size
-            )
-            break
-        except: 
-            pass
+    fit_text_to_box(
+        text_frame,
+        width=Inches(text_width),
+        height=Inches(text_height),
+        font_file=font.basic,
+        max_size=int(font.max_size * text_font_coeff),
+    )
            
     return slide
 
@@ -259,6 +254,7 @@ def generate_image_slide(
     picture_path: str,
     font: Font,
     text_font_coeff: float = 0.6,
+    rng: Optional[random.Random] = None,
 ) -> Slide:
     """
     Generate a slide with a title, text, and an image.
@@ -275,11 +271,12 @@ def generate_image_slide(
         font (Font): Font object to manage font styles and paths.
         text_font_coeff (float, optional): Coefficient to adjust the font size of the text 
                                            relative to the title (default is 0.65).
+        rng (Optional[random.Random]): Source of randomness for the layout choice.
 
     Returns:
         Slide
     """
-    gen_func = random.choice([
+    gen_func = (rng or random).choice([
         generate_text_title_image_right,
         generate_text_title_image_left,
     ])
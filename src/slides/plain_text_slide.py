@@ -12,7 +12,7 @@ import tqdm
 import os
 
 from src.font import Font
-from .slide_utils import add_paragraph
+from .slide_utils import add_paragraph, fit_text_to_box
 
 def generate_plain_text_slide(
     presentation: Presentation,
@@ -75,16 +75,14 @@ def generate_plain_text_slide(
     title_paragraph.alignment = PP_ALIGN.CENTER
     title_paragraph.text = title
 
-    for max_size in range(font.max_size)[::-5]:
-        try:
-            title_frame.fit_text(
-                font_file=font.bold,
-                max_size=max_size,
-                bold=True
-            )
-            break
-        except:
-            pass
+    fit_text_to_box(
+        title_frame,
+        width=Inches(title_width),
+        height=Inches(title_height),
+        font_file=font.bold,
+        max_size=font.max_size,
+        bold=True,
+    )
 
     # Add text
     text_left = margin
@@ -107,15 +105,13 @@ def generate_plain_text_slide(
     text_paragraph.alignment = PP_ALIGN.CENTER
     text_paragraph.text = text
 
-    for max_size in range(int(max_size * text_font_coeff))[::-5]:
-        try:
-            text_frame.fit_text(
-                font_file=font.basic,
-                max_size=max_size
-            )
-            break
-        except:
-            pass
+    fit_text_to_box(
+        text_frame,
+        width=Inches(text_width),
+        height=Inches(text_height),
+        font_file=font.basic,
+        max_size=int(font.max_size * text_font_coeff),
+    )
 
     return slide
     
\ No newline at end of file
@@ -3,14 +3,17 @@ from pptx.util import Inches
 from pptx.oxml.xmlchemy import OxmlElement
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR, MSO_AUTO_SIZE
+from pptx.util import Length, Pt
 
 import random
 import os
 from PIL import Image
-from typing import List, Callable
+from typing import List, Callable, Optional
 
 import tqdm
 
+from .text_metrics import best_fit_font_size
+
 def add_paragraph(text_frame): 
     try:
         title_paragraph = text_frame.paragraphs[0]
@@ -28,4 +31,49 @@ def set_shape_transparency(shape, alpha):
     """ Set the transparency (alpha) of a shape"""
     ts = shape.fill._xPr.solidFill
     sF = ts.get_or_change_to_srgbClr()
-    SubElement(sF, 'a:alpha', val=str(int(alpha*100000)))
\ No newline at end of file
+    SubElement(sF, 'a:alpha', val=str(int(alpha*100000)))
+
+def fit_text_to_box(
+    text_frame,
+    width: Length,
+    height: Length,
+    font_file: str,
+    max_size: int,
+    bold: bool = False,
+    font_family: str = "Calibri",
+) -> Optional[int]:
+    """
+    Same result as `text_frame.fit_text`, but the font size is chosen with the
+    cached glyph tables instead of rendering every candidate size with PIL.
+
+    Args:
+        text_frame: Text frame of a textbox of size (width, height).
+        width (Length): Width of the textbox.
+        height (Length): Height of the textbox.
+        font_file (str): Path to the .ttf file used for the metrics.
+        max_size (int): Largest font size to consider.
+        bold (bool): Whether the text is set in bold.
+        font_family (str): Font family written into the slide.
+
+    Returns:
+        Optional[int]: The applied font size, or None if the frame is empty
+            or the text does not fit at any size.
+    """
+    if text_frame.text == "":
+        return None
+    emu_per_point = Pt(1)
+    box_width = (width - text_frame.margin_left - text_frame.margin_right) / emu_per_point
+    box_height = (height - text_frame.margin_top - text_frame.margin_bottom) / emu_per_point
+    size = best_fit_font_size(text_frame.text, font_file, box_width, box_height, max_size)
+    if size is None:
+        return None
+
+    text_frame.auto_size = MSO_AUTO_SIZE.NONE
+    text_frame.word_wrap = True
+    for paragraph in text_frame.paragraphs:
+        for run in paragraph.runs:
+            run.font.name = font_family
+            run.font.size = Pt(size)
+            run.font.bold = bold
+            run.font.italic = False
+    return size
@@ -0,0 +1,193 @@
+import os
+import hashlib
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+from PIL import ImageFont
+
+# Glyph advances are measured once at this pixel size and scaled linearly.
+REFERENCE_SIZE = 1000
+# Codepoints covered by the table: Latin, Greek, Cyrillic and general punctuation.
+TABLE_SIZE = 0x2100
+# Bump when the table layout changes so stale cache files are rebuilt.
+CACHE_VERSION = 1
+
+
+class GlyphTable:
+    def __init__(self, advances: np.ndarray, line_height: float, fallback_advance: float):
+        """
+        Per-font glyph advance table in units of the font size.
+
+        Args:
+            advances (np.ndarray): Advance width of every codepoint below
+                TABLE_SIZE, divided by the font size.
+            line_height (float): Height of a rendered line divided by the font size.
+            fallback_advance (float): Advance used for codepoints outside the table.
+        """
+        self.advances = advances
+        self.line_height = line_height
+        self.fallback_advance = fallback_advance
+
+    def text_width(self, text: str) -> float:
+        """
+        Width of a single-line string in units of the font size.
+        """
+        codes = np.fromiter((ord(c) for c in text), dtype=np.int64, count=len(text))
+        inside = codes < TABLE_SIZE
+        width = self.advances[codes[inside]].sum()
+        width += self.fallback_advance * np.count_nonzero(~inside)
+        return float(width)
+
+    def word_widths(self, words: Sequence[str]) -> np.ndarray:
+        """
+        Widths of the given words in units of the font size.
+        """
+        return np.array([self.text_width(word) for word in words], dtype=np.float64)
+
+
+def _cache_path(font_file: str, cache_dir: Optional[str]) -> str:
+    if cache_dir is None:
+        cache_dir = os.environ.get(
+            "SLIDES_GLYPH_CACHE",
+            os.path.join(os.path.dirname(os.path.abspath(font_file)), ".glyph_cache"),
+        )
+    stat = os.stat(font_file)
+    key = f"{os.path.abspath(font_file)}:{stat.st_size}:{stat.st_mtime_ns}:{CACHE_VERSION}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(font_file))[0]
+    return os.path.join(cache_dir, f"{name}-{digest}.npz")
+
+
+def _build_glyph_table(font_file: str) -> GlyphTable:
+    """
+    Measure every codepoint of the table once with PIL.
+    """
+    image_font = ImageFont.truetype(font_file, REFERENCE_SIZE)
+    advances = np.array(
+        [image_font.getlength(chr(code)) for code in range(TABLE_SIZE)],
+        dtype=np.float32,
+    ) / REFERENCE_SIZE
+    # python-pptx measures line height from the bounding box of "Ty"
+    _, top, _, bottom = image_font.getbbox("Ty")
+    line_height = (bottom - top) / REFERENCE_SIZE
+    fallback_advance = float(advances[ord("a"):ord("z") + 1].mean())
+    return GlyphTable(advances, line_height, fallback_advance)
+
+
+@lru_cache(maxsize=None)
+def load_glyph_table(font_file: str, cache_dir: Optional[str] = None) -> GlyphTable:
+    """
+    Load the glyph advance table of a TrueType font, building and caching it
+    on disk on first use.
+
+    Args:
+        font_file (str): Path to the .ttf file.
+        cache_dir (Optional[str]): Directory for the cached tables. Defaults to
+            $SLIDES_GLYPH_CACHE or a `.glyph_cache` folder next to the font.
+
+    Returns:
+        GlyphTable: The advance table of the font.
+    """
+    path = _cache_path(font_file, cache_dir)
+    if os.path.exists(path):
+        try:
+            with np.load(path) as data:
+                return GlyphTable(
+                    advances=data["advances"],
+                    line_height=float(data["line_height"]),
+                    fallback_advance=float(data["fallback_advance"]),
+                )
+        except (OSError, KeyError, ValueError):
+            pass  # corrupted cache file, rebuild it below
+
+    table = _build_glyph_table(font_file)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            advances=table.advances,
+            line_height=table.line_height,
+            fallback_advance=table.fallback_advance,
+        )
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # read-only fonts directory, keep the in-memory table only
+    return table
+
+
+def wrapped_text_fits(
+    text: str,
+    table: GlyphTable,
+    width: float,
+    height: float,
+    sizes: Sequence[int],
+) -> np.ndarray:
+    """
+    Check for every candidate font size whether the text, greedily wrapped at
+    word boundaries, fits inside a box. All sizes are evaluated in one pass
+    over the words.
+
+    Args:
+        text (str): Text to measure.
+        table (GlyphTable): Glyph advances of the font.
+        width (float): Box width in points.
+        height (float): Box height in points.
+        sizes (Sequence[int]): Candidate font sizes in points.
+
+    Returns:
+        np.ndarray: Boolean mask, True where the text fits at that size.
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    words = text.split()
+    if not words:
+        return np.ones(sizes.shape, dtype=bool)
+
+    widths = table.word_widths(words)
+    space = table.text_width(" ")
+    # a line fits when its width in font-size units is below width / size
+    limit = width / sizes
+
+    line = np.full(sizes.shape, widths[0])
+    lines = np.ones(sizes.shape)
+    overflow = widths[0] > limit
+    for word_width in widths[1:]:
+        candidate = line + space + word_width
+        line_break = candidate > limit
+        lines += line_break
+        line = np.where(line_break, word_width, candidate)
+        overflow |= word_width > limit
+
+    text_height = lines * table.line_height * sizes
+    return ~overflow & (text_height <= height)
+
+
+def best_fit_font_size(
+    text: str,
+    font_file: str,
+    width: float,
+    height: float,
+    max_size: int,
+) -> Optional[int]:
+    """
+    Largest whole-number font size not greater than `max_size` at which the
+    text fits inside the box, or None if it does not fit at any size.
+
+    Args:
+        text (str): Text to fit.
+        font_file (str): Path to the .ttf file used for the metrics.
+        width (float): Box width in points.
+        height (float): Box height in points.
+        max_size (int): Largest font size to consider.
+
+    Returns:
+        Optional[int]: The chosen font size.
+    """
+    if max_size < 1:
+        return None
+    sizes = np.arange(1, int(max_size) + 1)
+    fits = wrapped_text_fits(text, load_glyph_table(font_file), width, height, sizes)
+    if not fits.any():
+        return None
+    return int(sizes[np.flatnonzero(fits)[-1]])
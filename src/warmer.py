@@ -0,0 +1,242 @@
+"""
+Off-peak cache warmer for popular presentation topics.
+
+Runs the titles, text, notes, image prompt and image calls of each topic
+exactly as generate_presentation does for a performance profile, so their
+results land in the LLM and image caches and later requests for the same
+topic and profile are served from them.
+
+Usage:
+    python -m src.warmer --topics topics.txt --max-llm-tokens 200000 --max-images 100
+    python -m src.warmer --top 20 --since-days 30 --max-images 50 --profile standard high
+"""
+import re
+import time
+import argparse
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .session import PresentationGenerator, PROMPT_CONFIGS
+from .llm_utils import (
+    llm_generate_titles,
+    llm_generate_slide_text,
+    llm_generate_slide_texts,
+    llm_generate_speaker_notes,
+    llm_generate_image_prompt,
+)
+from .image_policy import ASPECT_RATIOS, image_request
+from .prompt_budget import IMAGE_PROMPT_TOKEN_BUDGET, fit_prompt_to_budget
+from .circuit_breaker import CircuitOpenError
+from .profiles import DEFAULT_PROFILE, PROFILES, get_profile
+
+
+class BudgetExhausted(RuntimeError):
+    pass
+
+
+class SpendBudget:
+    def __init__(self, max_llm_tokens: Optional[int] = None, max_images: Optional[int] = None):
+        """
+        Spend limit of a warm-up run, charged only for calls reaching a backend.
+
+        LLM usage is estimated as 4 characters per token of prompt and answer,
+        which is close enough for budgeting without a tokenizer.
+
+        Args:
+            max_llm_tokens (Optional[int]): LLM tokens allowed, None for no limit.
+            max_images (Optional[int]): Generated images allowed, None for no limit.
+        """
+        self.max_llm_tokens = max_llm_tokens
+        self.max_images = max_images
+        self.llm_tokens = 0
+        self.llm_calls = 0
+        self.images = 0
+        self._lock = threading.Lock()
+
+    def _check_llm(self) -> None:
+        if self.max_llm_tokens is not None and self.llm_tokens >= self.max_llm_tokens:
+            raise BudgetExhausted(f"LLM budget of {self.max_llm_tokens} tokens spent.")
+
+    def _check_images(self) -> None:
+        if self.max_images is not None and self.images >= self.max_images:
+            raise BudgetExhausted(f"Image budget of {self.max_images} images spent.")
+
+    def wrap_llm(self, llm_generate: Callable[..., str]) -> Callable[..., str]:
+        def charged(prompt: str, **kwargs) -> str:
+            self._check_llm()
+            response = llm_generate(prompt, **kwargs)
+            with self._lock:
+                self.llm_calls += 1
+                self.llm_tokens += (len(prompt) + len(response)) // 4
+            return response
+
+        return charged
+
+    def wrap_image(self, generate_image: Callable[..., Any]) -> Callable[..., Any]:
+        def charged(*args, **kwargs):
+            self._check_images()
+            image = generate_image(*args, **kwargs)
+            with self._lock:
+                self.images += 1
+            return image
+
+        return charged
+
+    def wrap_images(self, generate_images: Callable[..., List[Any]]) -> Callable[..., List[Any]]:
+        def charged(prompts, *args, **kwargs):
+            if self.max_images is not None and self.images + len(prompts) > self.max_images:
+                raise BudgetExhausted(f"Image budget of {self.max_images} images spent.")
+            images = generate_images(prompts, *args, **kwargs)
+            with self._lock:
+                self.images += len(prompts)
+            return images
+
+        return charged
+
+    def stats(self) -> Dict[str, int]:
+        return {"llm_calls": self.llm_calls, "llm_tokens": self.llm_tokens, "images": self.images}
+
+
+def detect_language(description: str) -> str:
+    return "Russian" if re.search(r"[а-яё]", description, re.IGNORECASE) else "English"
+
+
+def read_topics(path: str) -> List[Tuple[str, str]]:
+    """
+    Topics file with one description per line; "#" starts a comment.
+
+    Returns:
+        List[Tuple[str, str]]: (description, language) pairs.
+    """
+    topics = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                topics.append((line, detect_language(line)))
+    return topics
+
+
+def warm_topic(
+    llm_generate: Callable[..., str],
+    generate_image: Callable[..., Any],
+    description: str,
+    language: str,
+    image_quality: Optional[str] = None,
+    aspects: Sequence[str] = tuple(ASPECT_RATIOS),
+    performance_profile: Optional[str] = None,
+) -> None:
+    """
+    Issue the backend calls of one deck so that their results are cached.
+    Images are generated in every aspect, as decks pick one at random.
+
+    The calls are those of `performance_profile` (see profiles): one batched
+    text call or one per slide, notes unless the profile skips them, and
+    images of the profile's quality unless `image_quality` overrides it.
+    `llm_generate` must use the profile's model, see warm_caches.
+    """
+    settings = get_profile(performance_profile)
+    image_quality = image_quality or settings.image_quality
+    prompt_config = PROMPT_CONFIGS[language]
+    titles = llm_generate_titles(llm_generate, description, prompt_config)
+    if settings.batch_text:
+        llm_generate_slide_texts(llm_generate, description, titles, prompt_config)
+    for title in titles:
+        if not settings.batch_text:
+            llm_generate_slide_text(llm_generate, description, title, prompt_config)
+        if settings.notes_mode != "skip":
+            llm_generate_speaker_notes(llm_generate, title, prompt_config)
+        if not settings.images:
+            continue
+        caption_prompt = llm_generate_image_prompt(llm_generate, description, title, prompt_config)
+        if not caption_prompt:
+            continue
+        caption_prompt, _ = fit_prompt_to_budget(caption_prompt, IMAGE_PROMPT_TOKEN_BUDGET)
+        for aspect in aspects:
+            generate_image(prompt=caption_prompt, **image_request(aspect, image_quality))
+
+
+def warm_caches(
+    generator: PresentationGenerator,
+    topics: List[Tuple[str, str]],
+    budget: SpendBudget,
+    image_quality: Optional[str] = None,
+    aspects: Sequence[str] = tuple(ASPECT_RATIOS),
+    performance_profile: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Warm the caches of a session with the given topics until the budget is spent.
+
+    Calls run with batch priority, so a warmer sharing the process with
+    interactive users yields the backends to them. Text calls go to the
+    model of `performance_profile`, whose answers are cached apart from
+    other models'.
+
+    Returns:
+        Dict[str, Any]: Warmed and skipped topics, spend and elapsed time.
+    """
+    settings = get_profile(performance_profile)
+    llm_generate, generate_image = generator.backends("batch", budget=budget, model_version=settings.model_version)
+    start = time.time()
+    warmed, failed = 0, 0
+    for index, (description, language) in enumerate(topics):
+        print(f"[{index + 1}/{len(topics)}] Warming: {description}")
+        try:
+            warm_topic(llm_generate, generate_image, description, language, image_quality, aspects, settings.name)
+            warmed += 1
+        except BudgetExhausted as e:
+            print(f"Stopping: {e}")
+            break
+        except CircuitOpenError as e:
+            print(f"Stopping: {e}")
+            break
+        except Exception as e:
+            print(f"Warming failed for '{description}': {e}")
+            failed += 1
+    return {
+        "performance_profile": settings.name,
+        "topics": len(topics),
+        "warmed": warmed,
+        "failed": failed,
+        "spent": budget.stats(),
+        "seconds": round(time.time() - start, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate popular topics into the LLM and image caches.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--topics", help="File with one presentation description per line")
+    source.add_argument("--top", type=int, help="Warm the N most requested descriptions from the artifact index")
+    parser.add_argument("--since-days", type=float, default=30.0, help="Window of past jobs used by --top")
+    parser.add_argument("--logs-dir", default="./logs", help="Artifact store holding past jobs")
+    parser.add_argument("--cache-dir", default="./cache")
+    parser.add_argument("--max-llm-tokens", type=int, default=None, help="Approximate LLM token budget")
+    parser.add_argument("--max-images", type=int, default=None, help="Number of images that may be generated")
+    parser.add_argument(
+        "--profile", nargs="+", choices=sorted(PROFILES), default=[DEFAULT_PROFILE],
+        help="Performance profiles whose calls are warmed, e.g. the app's and the CLI's defaults",
+    )
+    parser.add_argument(
+        "--image-quality", choices=["draft", "standard", "high"], default=None,
+        help="Overrides the image quality of the profiles",
+    )
+    parser.add_argument("--aspects", nargs="+", choices=sorted(ASPECT_RATIOS), default=sorted(ASPECT_RATIOS))
+    args = parser.parse_args()
+
+    with PresentationGenerator(logs_dir=args.logs_dir, cache_dir=args.cache_dir) as generator:
+        if args.topics:
+            topics = read_topics(args.topics)
+        else:
+            topics = [
+                (row["description"], row["language"] or detect_language(row["description"]))
+                for row in generator.artifacts.popular_descriptions(args.top, args.since_days)
+            ]
+        budget = SpendBudget(max_llm_tokens=args.max_llm_tokens, max_images=args.max_images)
+        for performance_profile in args.profile:
+            summary = warm_caches(generator, topics, budget, args.image_quality, args.aspects, performance_profile)
+            print(f"Warm-up done: {summary}")
+
+
+if __name__ == "__main__":
+    main()
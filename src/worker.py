@@ -0,0 +1,208 @@
+"""
+Worker processes pulling presentation jobs from a shared SQLite queue.
+
+Start any number of workers, on one host or on several hosts sharing the
+queue file and the artifacts directory, then submit jobs:
+
+    python -m src.worker run --queue jobs.db --artifacts ./artifacts
+    python -m src.worker submit "Create a presentation on electric vehicles." --queue jobs.db
+    python -m src.worker status --queue jobs.db [JOB_ID]
+"""
+import os
+import json
+import socket
+import argparse
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from .jobqueue import JobQueue
+from .admission import AdmissionController, TenantQuota
+from .session import PresentationGenerator, PROMPT_CONFIGS
+from .profiles import PROFILES, DEFAULT_PROFILE, get_profile
+from .cancellation import CancelToken, Cancelled
+
+# Job payload fields passed on to PresentationGenerator.generate.
+JOB_OPTIONS = (
+    "language", "time_limit", "priority", "profile", "preview", "image_quality", "tenant", "seed",
+    "performance_profile",
+)
+
+
+class Worker:
+    def __init__(
+        self,
+        queue: JobQueue,
+        generator: PresentationGenerator,
+        worker_id: Optional[str] = None,
+        poll_interval: float = 2.0,
+    ):
+        """
+        Runs queued jobs one at a time. Decks go to the session's artifact
+        store as `<job id>-<attempt>`, so results are found from any host
+        sharing the store, and an attempt that lost its lease never writes
+        into the folder of the attempt that took the job over. Losing the
+        lease cancels the attempt.
+
+        Args:
+            queue (JobQueue): Shared job queue.
+            generator (PresentationGenerator): Session generating the decks.
+            worker_id (Optional[str]): Name in the queue, defaults to host and pid.
+            poll_interval (float): Seconds between polls of an empty queue.
+        """
+        self.queue = queue
+        self.generator = generator
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+
+    def _heartbeat(self, job_id: str, done: threading.Event, cancel: CancelToken) -> None:
+        # renew the lease three times per lease period
+        while not done.wait(self.queue.lease_seconds / 3):
+            try:
+                renewed = self.queue.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                print(f"Worker {self.worker_id} could not renew the lease of job {job_id}: {e}")
+                renewed = False
+            if not renewed:
+                print(f"Worker {self.worker_id} lost the lease of job {job_id}")
+                cancel.cancel("lease lost")
+                return
+
+    def run_job(self, job: Dict[str, Any]) -> None:
+        payload = job["payload"]
+        options = {key: payload[key] for key in JOB_OPTIONS if key in payload}
+        # deferred notes would finish after the lease is released, so they are
+        # written inline; a profile skipping notes keeps skipping them
+        notes_mode = get_profile(options.get("performance_profile")).notes_mode
+        if notes_mode == "deferred":
+            notes_mode = "inline"
+
+        done = threading.Event()
+        cancel = CancelToken()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job["id"], done, cancel), daemon=True)
+        heartbeat.start()
+        start = time.time()
+        try:
+            path = self.generator.generate(
+                payload["description"], job_id=f"{job['id']}-{job['attempts']}", notes_mode=notes_mode,
+                cancel=cancel, **options,
+            )
+        except Cancelled:
+            # the job is requeued or taken over by another worker, its outcome is theirs
+            print(f"Job {job['id']} attempt {job['attempts']} stopped: {cancel.reason}")
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.queue.fail(job["id"], self.worker_id, f"{type(e).__name__}: {e}")
+            return
+        finally:
+            done.set()
+            heartbeat.join()
+
+        result = {"path": path, "worker": self.worker_id, "seconds": round(time.time() - start, 3)}
+        if not self.queue.complete(job["id"], self.worker_id, result):
+            print(f"Job {job['id']} finished after its lease expired, result left to the new owner")
+
+    def run_once(self) -> bool:
+        """
+        Run the next job, if any.
+
+        Returns:
+            bool: False if the queue was empty.
+        """
+        job = self.queue.claim(self.worker_id)
+        if job is None:
+            return False
+        print(f"Worker {self.worker_id} running job {job['id']} (attempt {job['attempts']})")
+        self.run_job(job)
+        return True
+
+    def run(self, max_jobs: Optional[int] = None) -> int:
+        """
+        Process jobs until stopped, or until `max_jobs` jobs were run.
+
+        Returns:
+            int: Number of jobs run.
+        """
+        count = 0
+        while not self._stop.is_set() and (max_jobs is None or count < max_jobs):
+            if self.run_once():
+                count += 1
+            else:
+                self._stop.wait(self.poll_interval)
+        return count
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presentation generation workers sharing a SQLite job queue.")
+    parser.add_argument("--queue", default="./jobs.db", help="SQLite queue file shared by all workers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Process queued jobs")
+    run_parser.add_argument("--artifacts", default="./artifacts", help="Shared artifact store receiving the decks")
+    run_parser.add_argument("--concurrency", type=int, default=1, help="Jobs run at once by this process")
+    run_parser.add_argument("--lease", type=float, default=120.0, help="Lease duration in seconds")
+    run_parser.add_argument("--max-attempts", type=int, default=3)
+    run_parser.add_argument("--max-jobs", type=int, default=None, help="Exit after this many jobs per thread")
+
+    submit_parser = subparsers.add_parser("submit", help="Queue a presentation")
+    submit_parser.add_argument("description")
+    submit_parser.add_argument("--language", choices=sorted(PROMPT_CONFIGS), default="English")
+    submit_parser.add_argument("--time-limit", type=float, default=None)
+    submit_parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE)
+    submit_parser.add_argument("--image-quality", choices=["draft", "standard", "high"], default=None)
+    submit_parser.add_argument("--seed", type=int, default=None)
+
+    status_parser = subparsers.add_parser("status", help="Show queue counts or one job")
+    status_parser.add_argument("job_id", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        job_id = JobQueue(args.queue).enqueue({
+            "description": args.description,
+            "language": args.language,
+            "time_limit": args.time_limit,
+            "image_quality": args.image_quality,
+            "seed": args.seed,
+            "performance_profile": args.profile,
+            "priority": "batch",
+        })
+        print(job_id)
+    elif args.command == "status":
+        queue = JobQueue(args.queue)
+        print(json.dumps(queue.get(args.job_id) if args.job_id else queue.stats(), ensure_ascii=False, indent=2))
+    else:
+        queue = JobQueue(args.queue, lease_seconds=args.lease, max_attempts=args.max_attempts)
+        # the shared queue already bounds the work, the session only runs this process' jobs
+        admission = AdmissionController(
+            max_running=args.concurrency,
+            default_quota=TenantQuota(max_concurrent=args.concurrency, rate_per_minute=None),
+        )
+        with PresentationGenerator(
+            logs_dir=args.artifacts, max_workers=args.concurrency, admission=admission,
+        ) as generator:
+            workers = [
+                Worker(queue, generator, worker_id=f"{socket.gethostname()}-{os.getpid()}-{i}")
+                for i in range(args.concurrency)
+            ]
+            threads = [threading.Thread(target=worker.run, args=(args.max_jobs,)) for worker in workers]
+            for thread in threads:
+                thread.start()
+            try:
+                for thread in threads:
+                    thread.join()
+            except KeyboardInterrupt:
+                print("Stopping after the running jobs...")
+                for worker in workers:
+                    worker.stop()
+                for thread in threads:
+                    thread.join()
+
+
+if __name__ == "__main__":
+    main()
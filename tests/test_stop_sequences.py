@@ -0,0 +1,33 @@
+from src.llm_utils import llm_generate_slide_text
+from src.prompt_configs.en_gigachat_config import en_gigachat_config
+
+# Answer echoing two few-shot examples after the slide text.
+ANSWER = (
+    "prompt: Electric cars cut emissions in cities.\n"
+    "prompt: The 20% sales increase is attributed to the new marketing strategy.\n"
+    "prompt: Innovative technologies have improved manufacturing efficiency by 30%.\n"
+)
+
+
+def canned_llm(answer, honour_stop=True):
+    """LLM returning `answer`, cut at the first stop sequence as the API does."""
+    def llm_generate(prompt, call_type=None, stop=None, **params):
+        if not honour_stop:
+            return answer
+        end = min([answer.find(s) for s in stop or [] if s in answer] or [len(answer)])
+        return answer[:end]
+
+    return llm_generate
+
+
+def test_text_stops_cut_echoed_examples():
+    llm_generate = canned_llm(ANSWER)
+    assert llm_generate("", **en_gigachat_config.params_for("text")) == "prompt: Electric cars cut emissions in cities."
+    text = llm_generate_slide_text(llm_generate, "Electric vehicles", "Benefits", en_gigachat_config)
+    assert text == "Electric cars cut emissions in cities."
+
+
+def test_echoed_examples_are_cut_without_stop_support():
+    llm_generate = canned_llm(ANSWER, honour_stop=False)
+    text = llm_generate_slide_text(llm_generate, "Electric vehicles", "Benefits", en_gigachat_config)
+    assert text == "Electric cars cut emissions in cities."